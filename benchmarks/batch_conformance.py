@@ -0,0 +1,78 @@
+"""Measures checking batches of objects against an intersection.
+
+Checking every element with isinstance() is compared with
+iter_conforming, for batches of instances of a few classes - ones
+defining all the protocols' members, and ones getting some of them in
+their own __dict__. Run with:
+
+    uv run python benchmarks/batch_conformance.py
+"""
+
+import time
+from collections import deque
+from typing import Protocol, runtime_checkable
+
+from typing_protocol_intersection import ProtocolIntersection as Has
+from typing_protocol_intersection import iter_conforming
+
+BATCH_SIZE = 100_000
+CLASS_COUNT = 4
+REPEATS = 5
+
+
+@runtime_checkable
+class X(Protocol):
+    def x(self) -> str: ...
+
+
+@runtime_checkable
+class Y(Protocol):
+    def y(self) -> str: ...
+
+
+def mk_batch(*, instance_level: bool) -> list[object]:
+    classes = []
+    for i in range(CLASS_COUNT):
+        namespace = {"x": lambda self: "x", "y": lambda self: "y"}
+        if instance_level:
+            # x is set by __init__, like dataclass fields without defaults are
+            del namespace["x"]
+            namespace["__init__"] = lambda self: setattr(self, "x", lambda: "x")
+        classes.append(type(f"Impl{i}", (), namespace))
+    return [classes[i % CLASS_COUNT]() for i in range(BATCH_SIZE)]
+
+
+def check_one_by_one(batch: list[object]) -> None:
+    intersection = Has[X, Y]
+    for element in batch:
+        if not isinstance(element, intersection):  # pylint: disable=isinstance-second-argument-not-valid-type
+            raise TypeError(element)
+
+
+def check_batch(batch: list[object]) -> None:
+    deque(iter_conforming(Has[X, Y], batch), maxlen=0)
+
+
+def measure(check, batch: list[object]) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        check(batch)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    print(f"{'members defined by':>18} {'one by one':>10} {'batch':>9}")
+    for instance_level in (False, True):
+        batch = mk_batch(instance_level=instance_level)
+        one_by_one_seconds = measure(check_one_by_one, batch)
+        batch_seconds = measure(check_batch, batch)
+        print(
+            f"{'instance' if instance_level else 'class':>18} {one_by_one_seconds * 1000:>7.1f} ms"
+            f" {batch_seconds * 1000:>6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
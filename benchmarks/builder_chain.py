@@ -0,0 +1,101 @@
+"""Measures how folding the intersections of builder chains scales with their length.
+
+Every step of a chain like Builder().with_p0().with_p1()... folds the
+intersection of the previous step and one more protocol. Folded from
+scratch, every step goes through all the members collected so far, so
+a whole chain takes quadratic time. Extended, a step only goes through
+the new protocol, but it still copies the member table, the MRO and
+the sets of the previous step's intersection - so the time per step
+still grows with the length of the chain, only a lot slower. Run with:
+
+    uv run python benchmarks/builder_chain.py
+"""
+
+import time
+
+import mypy.nodes
+import mypy.types
+
+from typing_protocol_intersection.mypy_intersections import IntersectionCache, mk_protocol_intersection_typeinfo
+from typing_protocol_intersection.mypy_plugin import PluginSettings, normalize_intersection_args
+
+DEPTH = 3
+ATTRIBUTES = 5
+REPEATS = 5
+
+
+def mk_type_info(name: str, bases: list[mypy.nodes.TypeInfo]) -> mypy.nodes.TypeInfo:
+    defn = mypy.nodes.ClassDef(name, mypy.nodes.Block([]))
+    defn.fullname = f"benchmark.{name}"
+    type_info = mypy.nodes.TypeInfo(mypy.nodes.SymbolTable(), defn, "benchmark")
+    type_info.mro = [type_info, *bases]
+    type_info.is_protocol = True
+    for attribute in range(ATTRIBUTES):
+        type_info.names[f"{name.lower()}_{attribute}"] = mypy.nodes.SymbolTableNode(mypy.nodes.MDEF, None)
+    return type_info
+
+
+def mk_members(length: int) -> list[mypy.types.Instance]:
+    members = []
+    for i in range(length):
+        bases: list[mypy.nodes.TypeInfo] = []
+        for depth in range(DEPTH):
+            bases.insert(0, mk_type_info(f"P{i}Base{depth}", list(bases)))
+        members.append(mypy.types.Instance(mk_type_info(f"P{i}", bases), []))
+    return members
+
+
+def mk_module() -> mypy.nodes.MypyFile:
+    module = mypy.nodes.MypyFile([], [])
+    module._fullname = "benchmark"  # pylint: disable=protected-access
+    module.names = mypy.nodes.SymbolTable()
+    return module
+
+
+def fold_from_scratch(members: list[mypy.types.Instance]) -> None:
+    module, intersections = mk_module(), IntersectionCache(PluginSettings().cache_size)
+    folded: list[mypy.types.Instance] = []
+    for member in members:
+        folded = normalize_intersection_args([*folded, member])
+        intersections.get(module, folded)
+
+
+def fold_extending(members: list[mypy.types.Instance]) -> None:
+    module, intersections = mk_module(), IntersectionCache(PluginSettings().cache_size)
+    # the annotation of a builder method, like Has[T, P0] - T is substituted with the previous step's intersection
+    annotation = mk_protocol_intersection_typeinfo("ProtocolIntersection", module=module, content=[])
+    previous: mypy.types.Type = mypy.types.UninhabitedType()
+    for member in members:
+        intersection = mypy.types.Instance(annotation, [previous, member])
+        extended = intersections.extend(module, intersection, max_width=len(members))
+        if extended is None:
+            type_info = intersections.get(module, [member])
+            previous = mypy.types.Instance(type_info, [member])
+        else:
+            type_info, folded = extended
+            previous = mypy.types.Instance(type_info, list(folded))
+
+
+def measure(fold, members: list[mypy.types.Instance]) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fold(members)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    print(f"{'length':>6} {'from scratch':>12} {'extending':>10} {'scratch/step':>13} {'extending/step':>15}")
+    for length in (5, 10, 20, 40, 80):
+        members = mk_members(length)
+        scratch_seconds = measure(fold_from_scratch, members)
+        extending_seconds = measure(fold_extending, members)
+        print(
+            f"{length:>6} {scratch_seconds * 1000:>9.3f} ms {extending_seconds * 1000:>7.3f} ms"
+            f" {scratch_seconds / length * 10**6:>10.1f} us {extending_seconds / length * 10**6:>12.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Measures attribute access through composite proxies.
+
+Accessing a data member and a method through a proxy made by composite()
+is compared with accessing them on the parts directly, and through a
+wrapper forwarding them with __getattr__, the usual hand-written way.
+Run with:
+
+    uv run python benchmarks/composite_proxy.py
+"""
+
+import functools
+import timeit
+from typing import Any, Protocol
+
+from typing_protocol_intersection import composite
+
+NUMBER = 1_000_000
+
+
+class X(Protocol):
+    x: str
+
+
+class Y(Protocol):
+    def y(self) -> str: ...
+
+
+class XImpl:
+    def __init__(self) -> None:
+        self.x = "x"
+
+
+class YImpl:
+    def y(self) -> str:
+        return "y"
+
+
+class ForwardingWrapper:
+    def __init__(self, *parts: object) -> None:
+        self._parts = parts
+
+    def __getattr__(self, name: str) -> Any:
+        for part in self._parts:
+            try:
+                return getattr(part, name)
+            except AttributeError:
+                pass
+        raise AttributeError(name)
+
+
+def main() -> None:
+    x_impl, y_impl = XImpl(), YImpl()
+    targets = {
+        "parts": (x_impl, y_impl),
+        "composite": (composite(X, Y)(x_impl, y_impl),) * 2,
+        "__getattr__": (ForwardingWrapper(x_impl, y_impl),) * 2,
+    }
+    print(f"{'through':>11} {'.x':>9} {'.y':>9}")
+    for name, (x_target, y_target) in targets.items():
+        x_seconds = timeit.timeit(functools.partial(getattr, x_target, "x"), number=NUMBER)
+        y_seconds = timeit.timeit(functools.partial(getattr, y_target, "y"), number=NUMBER)
+        print(f"{name:>11} {x_seconds / NUMBER * 10**9:>6.0f} ns {y_seconds / NUMBER * 10**9:>6.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
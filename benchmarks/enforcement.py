@@ -0,0 +1,55 @@
+"""Measures the overhead enforce_intersections adds to calls.
+
+Calls of a plain function are compared with calls of the same function
+checked on every call, and checked on every 100th and 1000th call only.
+Run with:
+
+    uv run python benchmarks/enforcement.py
+"""
+
+import timeit
+from typing import Protocol, runtime_checkable
+
+from typing_protocol_intersection import ProtocolIntersection as Has
+from typing_protocol_intersection import enforce_intersections
+
+NUMBER = 200_000
+
+
+@runtime_checkable
+class X(Protocol):
+    def x(self) -> str: ...
+
+
+@runtime_checkable
+class Y(Protocol):
+    def y(self) -> str: ...
+
+
+class XY:
+    def x(self) -> str:
+        return "x"
+
+    def y(self) -> str:
+        return "y"
+
+
+def consume(obj: Has[X, Y]) -> Has[X, Y]:
+    return obj
+
+
+def main() -> None:
+    obj = XY()
+    variants = {
+        "plain": consume,
+        "checked": enforce_intersections(consume),
+        "sample=100": enforce_intersections(sample=100)(consume),
+        "sample=1000": enforce_intersections(sample=1000)(consume),
+    }
+    for name, func in variants.items():
+        seconds = timeit.timeit(lambda func=func: func(obj), number=NUMBER)
+        print(f"{name:>11} {seconds / NUMBER * 10**9:>7.0f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
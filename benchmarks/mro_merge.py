@@ -0,0 +1,80 @@
+"""Measures how folding ProtocolIntersections scales with their width.
+
+Every member protocol has a hierarchy of its own bases, plus a couple
+of bases shared with all the other members (like typing.Protocol and
+object are). The time per MRO entry (building the member table
+included) stays flat for the current merge, while the legacy one grows
+with the width. Run with:
+
+    uv run python benchmarks/mro_merge.py
+"""
+
+import time
+
+import mypy.nodes
+import mypy.types
+
+from typing_protocol_intersection.mypy_intersections import merge_intersection_members
+
+DEPTH = 5
+REPEATS = 20
+
+
+def mk_type_info(name: str, bases: list[mypy.nodes.TypeInfo]) -> mypy.nodes.TypeInfo:
+    defn = mypy.nodes.ClassDef(name, mypy.nodes.Block([]))
+    defn.fullname = f"benchmark.{name}"
+    type_info = mypy.nodes.TypeInfo(mypy.nodes.SymbolTable(), defn, "benchmark")
+    type_info.mro = [type_info, *bases]
+    return type_info
+
+
+def mk_members(width: int) -> list[mypy.types.Instance]:
+    shared = [mk_type_info("Shared", []), mk_type_info("object", [])]
+    members = []
+    for i in range(width):
+        bases = list(shared)
+        for depth in range(DEPTH):
+            bases.insert(0, mk_type_info(f"P{i}Base{depth}", list(bases)))
+        members.append(mypy.types.Instance(mk_type_info(f"P{i}", bases), []))
+    return members
+
+
+def legacy_fold(members: list[mypy.types.Instance], type_info: mypy.nodes.TypeInfo) -> mypy.nodes.TypeInfo:
+    for typ in members:
+        type_info.mro = [base for base in typ.type.mro if base not in type_info.mro] + type_info.mro
+    return type_info
+
+
+def current_fold(members: list[mypy.types.Instance], type_info: mypy.nodes.TypeInfo) -> mypy.nodes.TypeInfo:
+    return merge_intersection_members(members, type_info)
+
+
+def measure(fold, members: list[mypy.types.Instance]) -> tuple[float, list[mypy.nodes.TypeInfo]]:
+    best = float("inf")
+    mro: list[mypy.nodes.TypeInfo] = []
+    for _ in range(REPEATS):
+        type_info = mk_type_info("ProtocolIntersection", [])
+        start = time.perf_counter()
+        fold(members, type_info)
+        best = min(best, time.perf_counter() - start)
+        mro = type_info.mro
+    return best, mro
+
+
+def main() -> None:
+    print(f"{'width':>5} {'MRO size':>8} {'legacy':>10} {'current':>10} {'legacy/entry':>13} {'current/entry':>14}")
+    for width in (2, 5, 10, 20, 50, 100, 200):
+        members = mk_members(width)
+        legacy_seconds, legacy_mro = measure(legacy_fold, members)
+        current_seconds, current_mro = measure(current_fold, members)
+        # the legacy merge put the intersection itself last, the current one puts it first
+        assert [t.fullname for t in legacy_mro[:-1]] == [t.fullname for t in current_mro[1:]], "MRO order changed"
+        size = len(current_mro)
+        print(
+            f"{width:>5} {size:>8} {legacy_seconds * 1000:>7.3f} ms {current_seconds * 1000:>7.3f} ms"
+            f" {legacy_seconds / size * 10**9:>10.1f} ns {current_seconds / size * 10**9:>11.1f} ns"
+        )
+
+
+if __name__ == "__main__":
+    main()
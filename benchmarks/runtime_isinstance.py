@@ -0,0 +1,64 @@
+"""Measures isinstance() checks against intersections of runtime_checkable protocols.
+
+Checks against the intersection are compared with hand-rolled chains of
+checks against every member protocol, for objects whose classes define
+the protocols' members, and for objects that only get some of them in
+their own __dict__ - with the intersection held in a variable, and
+subscripted inline for every check. Run with:
+
+    uv run python benchmarks/runtime_isinstance.py
+"""
+
+import functools
+import timeit
+from typing import Protocol, runtime_checkable
+
+from typing_protocol_intersection import ProtocolIntersection as Has
+
+PROTOCOL_COUNT = 5
+MEMBERS_PER_PROTOCOL = 4
+NUMBER = 20_000
+
+
+def mk_protocols() -> list[type]:
+    protocols = []
+    for i in range(PROTOCOL_COUNT):
+        namespace = {f"p{i}_m{m}": lambda self: None for m in range(MEMBERS_PER_PROTOCOL)}
+        protocols.append(runtime_checkable(type(f"P{i}", (Protocol,), namespace)))
+    return protocols
+
+
+def mk_class(*, instance_level: bool) -> type:
+    namespace = {f"p{i}_m{m}": lambda self: None for i in range(PROTOCOL_COUNT) for m in range(MEMBERS_PER_PROTOCOL)}
+    if instance_level:
+        # the first member is set by __init__, like dataclass fields without defaults are
+        del namespace["p0_m0"]
+        namespace["__init__"] = lambda self: setattr(self, "p0_m0", lambda: None)
+    return type("Impl", (), namespace)
+
+
+def check_chain(obj: object, protocols: list[type]) -> bool:
+    return all(isinstance(obj, protocol) for protocol in protocols)
+
+
+def check_inline(obj: object, protocols: tuple[type, ...]) -> bool:
+    return isinstance(obj, Has[protocols])
+
+
+def main() -> None:
+    protocols = mk_protocols()
+    intersection = Has[tuple(protocols)]
+    print(f"{'members defined by':>18} {'chain':>9} {'intersection':>12} {'inline':>9}")
+    for instance_level in (False, True):
+        obj = mk_class(instance_level=instance_level)()
+        chain_seconds = timeit.timeit(functools.partial(check_chain, obj, protocols), number=NUMBER)
+        intersection_seconds = timeit.timeit(functools.partial(isinstance, obj, intersection), number=NUMBER)
+        inline_seconds = timeit.timeit(functools.partial(check_inline, obj, tuple(protocols)), number=NUMBER)
+        print(
+            f"{'instance' if instance_level else 'class':>18} {chain_seconds / NUMBER * 10**6:>6.2f} us"
+            f" {intersection_seconds / NUMBER * 10**6:>9.2f} us {inline_seconds / NUMBER * 10**6:>6.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
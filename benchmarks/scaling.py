@@ -0,0 +1,201 @@
+"""Measures how mypy runs scale with the size of the checked project.
+
+Synthetic projects are generated along a couple of axes - the number of
+modules, of protocols, the width of annotated intersections, the length
+of builder chains (like Builder().with_x().with_y() in tests/testcases)
+and the depth of protocol inheritance. Each axis is varied on its own,
+with the others kept at BASE_SHAPE. Every project is checked with and
+without the plugin, with a cold and a warm cache, and the wall time and
+peak RSS of mypy are recorded. Run with:
+
+    uv run python benchmarks/scaling.py [AXIS ...] [--json REPORT] [--keep-projects DIR]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+FUNCTIONS_PER_MODULE = 10
+
+
+class ProjectShape(typing.NamedTuple):
+    modules: int
+    protocols: int
+    width: int
+    chain_depth: int
+    inheritance_depth: int
+
+
+BASE_SHAPE = ProjectShape(modules=20, protocols=20, width=3, chain_depth=4, inheritance_depth=2)
+AXES: dict[str, tuple[int, ...]] = {
+    "modules": (5, 20, 80),
+    "protocols": (10, 40, 160),
+    "width": (1, 2, 4),
+    "chain_depth": (4, 8, 16),
+    "inheritance_depth": (0, 2, 8),
+}
+
+
+class Measurement(typing.NamedTuple):
+    axis: str
+    shape: ProjectShape
+    plugin: bool
+    cache: str
+    seconds: float
+    peak_rss_mib: float
+    exit_code: int
+
+
+def generate_project(path: Path, shape: ProjectShape) -> None:
+    """Writes a project of the given shape to path, along with mypy configs with and without the plugin."""
+    if shape.width > shape.chain_depth or shape.chain_depth > shape.protocols:
+        raise ValueError(f"intersections can't be wider than builder chains, nor chains longer than protocols: {shape}")
+    path.mkdir(parents=True)
+    (path / "protocols.py").write_text(_protocols_module(shape))
+    (path / "builder.py").write_text(_builder_module(shape))
+    for module in range(shape.modules):
+        (path / f"module_{module}.py").write_text(_functions_module(shape, module))
+    for plugin in (False, True):
+        (path / _config_name(plugin)).write_text(_mypy_config(plugin))
+
+
+def _protocols_module(shape: ProjectShape) -> str:
+    lines = ["from typing import Protocol", ""]
+    for protocol in range(shape.protocols):
+        bases = "Protocol"
+        for depth in range(shape.inheritance_depth):
+            lines += ["", f"class P{protocol}Base{depth}({bases}):", f"    p{protocol}_base{depth}: int", ""]
+            bases = f"P{protocol}Base{depth}, Protocol"
+        lines += ["", f"class P{protocol}({bases}):", f"    p{protocol}: int", ""]
+    return "\n".join(lines)
+
+
+def _builder_module(shape: ProjectShape) -> str:
+    lines = [
+        "from typing import Generic, TypeVar",
+        "",
+        "from typing_protocol_intersection import ProtocolIntersection as Has",
+        "",
+        "import protocols",
+        "",
+        'T = TypeVar("T")',
+        "",
+        "",
+        "class Builder(Generic[T]):",
+    ]
+    for protocol in range(shape.protocols):
+        lines += [
+            f'    def with_p{protocol}(self) -> "Builder[Has[T, protocols.P{protocol}]]":',
+            "        return self  # type: ignore",
+            "",
+        ]
+    lines += ["    def build(self) -> T:", "        return self  # type: ignore", ""]
+    return "\n".join(lines)
+
+
+def _functions_module(shape: ProjectShape, module: int) -> str:
+    lines = [
+        "from typing_protocol_intersection import ProtocolIntersection as Has",
+        "",
+        "import protocols",
+        "from builder import Builder",
+    ]
+    for function in range(FUNCTIONS_PER_MODULE):
+        first = (module * FUNCTIONS_PER_MODULE + function) % shape.protocols
+        chain = [(first + link) % shape.protocols for link in range(shape.chain_depth)]
+        required = chain[: shape.width]
+        annotation = ", ".join(f"protocols.P{protocol}" for protocol in required)
+        attributes = " + ".join(f"obj.p{protocol}" for protocol in required)
+        calls = "".join(f".with_p{protocol}()" for protocol in chain)
+        lines += [
+            "",
+            "",
+            f"def consume_{function}(obj: Has[{annotation}]) -> int:",
+            f"    return {attributes}",
+            "",
+            "",
+            f"def produce_{function}() -> int:",
+            f"    return consume_{function}(Builder(){calls}.build())",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def _config_name(plugin: bool) -> str:
+    return "mypy-plugin.ini" if plugin else "mypy-no-plugin.ini"
+
+
+def _mypy_config(plugin: bool) -> str:
+    lines = ["[mypy]", f"mypy_path = {REPO_ROOT}"]
+    if plugin:
+        lines.append(f"plugins = {REPO_ROOT / 'typing_protocol_intersection' / 'mypy_plugin.py'}")
+    return "\n".join(lines) + "\n"
+
+
+def run_mypy(project: Path, *, plugin: bool, cache_dir: Path) -> tuple[float, float, int]:
+    """Checks the project, returning the wall time in seconds, peak RSS in MiB and the exit code of mypy."""
+    command = [sys.executable, "-m", "mypy", "--config-file", str(project / _config_name(plugin))]
+    command += ["--cache-dir", str(cache_dir), "--no-site-packages", str(project)]
+    start = time.perf_counter()
+    with subprocess.Popen(command, cwd=project, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) as process:  # noqa: S603
+        # unlike resource.getrusage(), wait4 reports the peak RSS of this very child, and not of all of them so far
+        _, status, rusage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - start
+        # the child is reaped already, Popen only needs to know it
+        process.returncode = os.waitstatus_to_exitcode(status)
+    return seconds, rusage.ru_maxrss / 1024, process.returncode
+
+
+def measure(axis: str, shape: ProjectShape, workdir: Path) -> list[Measurement]:
+    project = workdir / f"{axis}-{getattr(shape, axis)}"
+    generate_project(project, shape)
+    measurements = []
+    for plugin in (False, True):
+        cache_dir = workdir / f"cache-{project.name}-{plugin}"
+        for cache in ("cold", "warm"):
+            seconds, peak_rss_mib, exit_code = run_mypy(project, plugin=plugin, cache_dir=cache_dir)
+            measurements.append(Measurement(axis, shape, plugin, cache, seconds, peak_rss_mib, exit_code))
+        shutil.rmtree(cache_dir)
+    return measurements
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", maxsplit=1)[0])
+    parser.add_argument(
+        "axes", nargs="*", metavar="AXIS", help=f"axes to measure along: {', '.join(AXES)} (default: all)"
+    )
+    parser.add_argument("--json", type=Path, help="write the measurements to this file as well")
+    parser.add_argument("--keep-projects", type=Path, help="generate the projects in this directory and keep them")
+    args = parser.parse_args()
+    if unknown_axes := set(args.axes) - set(AXES):
+        parser.error(f"unknown axes: {', '.join(sorted(unknown_axes))}")
+
+    workdir = args.keep_projects or Path(tempfile.mkdtemp(prefix="protocol-intersection-scaling-"))
+    measurements = []
+    print(f"{'axis':>17} {'value':>5} {'plugin':>6} {'cache':>5} {'time':>8} {'peak RSS':>10} {'exit code':>9}")
+    try:
+        for axis in args.axes or AXES:
+            for value in AXES[axis]:
+                shape = BASE_SHAPE._replace(**{axis: value})
+                for measurement in measure(axis, shape, workdir):
+                    measurements.append(measurement)
+                    print(
+                        f"{axis:>17} {value:>5} {'yes' if measurement.plugin else 'no':>6} {measurement.cache:>5}"
+                        f" {measurement.seconds:>6.2f} s {measurement.peak_rss_mib:>6.1f} MiB {measurement.exit_code:>9}"
+                    )
+    finally:
+        if args.keep_projects is None:
+            shutil.rmtree(workdir)
+    if args.json is not None:
+        args.json.write_text(json.dumps([{**m._asdict(), "shape": m.shape._asdict()} for m in measurements], indent=2))
+
+
+if __name__ == "__main__":
+    main()
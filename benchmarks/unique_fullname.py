@@ -0,0 +1,53 @@
+"""Compares the memory and hashing cost of UniqueFullname suffixes.
+
+The legacy scheme appended N zero-width spaces to the N-th fullname, the
+current one writes a 64-bit hash of the intersection's members down with
+UniqueFullname.INVISIBLE_DIGITS, so its length stays the same however
+many intersections there are. Run with:
+
+    uv run python benchmarks/unique_fullname.py
+"""
+
+import sys
+import time
+from collections.abc import Callable, Iterator
+
+from typing_protocol_intersection.mypy_intersections import UniqueFullname
+
+BASE_FULLNAME = "typing_protocol_intersection.types.ProtocolIntersection"
+
+
+def legacy_fullnames(count: int) -> Iterator[str]:
+    for number in range(1, count + 1):
+        yield BASE_FULLNAME + number * "\u200b"
+
+
+def content_hashed_fullnames(count: int) -> Iterator[str]:
+    for number in range(1, count + 1):
+        # like the fullnames of the members of the N-th intersection
+        yield UniqueFullname(BASE_FULLNAME, (f"module.P{number}", f"module.Q{number}"))
+
+
+def measure(fullnames: Callable[[int], Iterator[str]], count: int) -> tuple[int, float]:
+    # Names are generated one by one and dropped right after being measured - with the legacy scheme all of them at once
+    # wouldn't fit in memory for the bigger counts.
+    total_bytes = 0
+    hashing_seconds = 0.0
+    for fullname in fullnames(count):
+        total_bytes += sys.getsizeof(fullname)
+        start = time.perf_counter()
+        hash(fullname)  # str caches its hash, so this is the first and only (full) computation
+        hashing_seconds += time.perf_counter() - start
+    return total_bytes, hashing_seconds
+
+
+def main() -> None:
+    print(f"{'intersections':>13} {'scheme':>8} {'total size':>14} {'hashing time':>13}")
+    for count in (10_000, 100_000):
+        for scheme, fullnames in (("legacy", legacy_fullnames), ("hashed", content_hashed_fullnames)):
+            total_bytes, hashing_seconds = measure(fullnames, count)
+            print(f"{count:>13} {scheme:>8} {total_bytes / 2**20:>11.2f} MB {hashing_seconds * 1000:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
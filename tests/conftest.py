@@ -1,16 +1,71 @@
 import typing
 from pathlib import Path
+from typing import Protocol, runtime_checkable
 
 import mypy.api
+import mypy.nodes
 import pytest
+from runtime_protocols import HasX, HasY
+
+import typing_protocol_intersection.types
+from typing_protocol_intersection import ProtocolIntersection
+from typing_protocol_intersection.mypy_intersections import UniqueFullname
 
 HERE = Path(__file__).parent
 
 
+@pytest.fixture(scope="session")
+def testcase_outputs() -> dict[Path, tuple[str, str]]:
+    return run_mypy_batch(sorted((HERE / "testcases").glob("*.py")))
+
+
+def run_mypy_batch(input_files: typing.Sequence[Path]) -> dict[Path, tuple[str, str]]:
+    """Checks all the files in a single mypy run and splits its output per
+    file.
+
+    Typeshed is only analyzed once this way, instead of once per file.
+    Every file gets the stdout it would get if it was checked on its own
+    - its own messages, followed by a summary line of its own.
+    """
+    stdout, stderr, exit_status = mypy.api.run(
+        [*map(str, input_files), "--config-file", str(HERE / "test-mypy.ini"), "--no-incremental"]
+    )
+    if exit_status > 1:
+        # a blocking error (e.g. a syntax error) stops the whole run, so let every file report its own problems
+        return {path.resolve(): _run_mypy_once(path) for path in input_files}
+    messages: dict[Path, list[str]] = {path.resolve(): [] for path in input_files}
+    for line in stdout.splitlines():
+        if line.startswith(("Success: ", "Found ")):
+            continue
+        path = Path(line.split(":", maxsplit=1)[0]).resolve()
+        assert path in messages, f"a message that can't be attributed to any of the checked files: {line}"
+        messages[path].append(line)
+    return {
+        path: (_strip_invisible("\n".join([*file_messages, _summary(file_messages)])), _strip_invisible(stderr))
+        for path, file_messages in messages.items()
+    }
+
+
+def _summary(messages: list[str]) -> str:
+    errors = sum(": error: " in message for message in messages)
+    if not errors:
+        return "Success: no issues found in 1 source file"
+    return f"Found {errors} error{'s' if errors > 1 else ''} in 1 file (checked 1 source file)"
+
+
+def _run_mypy_once(input_file: Path) -> tuple[str, str]:
+    stdout, stderr, _ = mypy.api.run(
+        [str(input_file), "--config-file", str(HERE / "test-mypy.ini"), "--no-incremental"]
+    )
+    return _strip_invisible(stdout), _strip_invisible(stderr)
+
+
 @pytest.fixture
 def run_mypy(strip_invisible: typing.Callable[[str], str]):
-    def _run_mypy(input_file: Path, no_incremental: bool = True) -> tuple[str, str]:
-        args = [str(input_file), "--config-file", str(HERE / "test-mypy.ini")]
+    def _run_mypy(
+        input_file: Path, no_incremental: bool = True, extra_args: typing.Sequence[str] = ()
+    ) -> tuple[str, str]:
+        args = [str(input_file), "--config-file", str(HERE / "test-mypy.ini"), *extra_args]
         if no_incremental:
             args.append("--no-incremental")
         stdout, stderr, _ = mypy.api.run(args)
@@ -21,14 +76,67 @@ def run_mypy(strip_invisible: typing.Callable[[str], str]):
 
 @pytest.fixture
 def strip_invisible() -> typing.Callable[[str], str]:
-    def _strip_invisible(string: str) -> str:
-        """Removes all zero-width spaces from the input text and strips
-        whitespaces.
+    return _strip_invisible
 
-        The need for the former was born with an ugly hack that we use
-        to trick mypyc.
-        """
-        zero_width_space = "\u200b"
-        return string.strip().replace(zero_width_space, "")
 
-    return _strip_invisible
+def _strip_invisible(string: str) -> str:
+    """Removes all invisible characters used in UniqueFullnames from the
+    input text and strips whitespaces.
+
+    The need for the former was born with an ugly hack that we use to
+    trick mypyc.
+    """
+    return string.strip().translate(dict.fromkeys(map(ord, UniqueFullname.INVISIBLE_DIGITS)))
+
+
+@pytest.fixture
+def mk_module() -> typing.Callable[[str], mypy.nodes.MypyFile]:
+    return _mk_module
+
+
+def _mk_module(fullname: str) -> mypy.nodes.MypyFile:
+    module = mypy.nodes.MypyFile([], [])
+    module._fullname = fullname  # pylint: disable=protected-access
+    module.names = mypy.nodes.SymbolTable()
+    return module
+
+
+@pytest.fixture
+def mk_protocol_type_info() -> typing.Callable[[str], mypy.nodes.TypeInfo]:
+    return _mk_protocol_type_info
+
+
+def _mk_protocol_type_info(name: str) -> mypy.nodes.TypeInfo:
+    """Makes the TypeInfo of a protocol with a single member, named after the protocol."""
+    defn = mypy.nodes.ClassDef(name, mypy.nodes.Block([]))
+    defn.fullname = f"protocols.{name}"
+    type_info = mypy.nodes.TypeInfo(mypy.nodes.SymbolTable(), defn, "protocols")
+    type_info.mro = [type_info]
+    type_info.is_protocol = True
+    type_info.names[name.lower()] = mypy.nodes.SymbolTableNode(mypy.nodes.MDEF, None)
+    return type_info
+
+
+@pytest.fixture
+def inspected_classes(monkeypatch: pytest.MonkeyPatch) -> list[type]:
+    """Records the classes whose members runtime checks against intersections go through, in order."""
+    classes: list[type] = []
+    residual_members_of = typing_protocol_intersection.types._residual_members_of  # pylint: disable=protected-access
+    monkeypatch.setattr(
+        typing_protocol_intersection.types,
+        "_residual_members_of",
+        lambda cls, members: classes.append(cls) or residual_members_of(cls, members),
+    )
+    return classes
+
+
+@pytest.fixture
+def fresh_xy_intersection() -> typing.Any:
+    """Makes an intersection of HasX and a HasY that nothing has been checked against yet."""
+
+    # aliases are interned, so the intersection has to be of a new protocol for nothing to be cached yet
+    @runtime_checkable
+    class HasFreshY(HasY, Protocol):
+        pass
+
+    return ProtocolIntersection[HasX, HasFreshY]
@@ -0,0 +1,32 @@
+import dataclasses
+from typing import Protocol, runtime_checkable
+
+
+@runtime_checkable
+class HasX(Protocol):
+    x: str
+
+
+@runtime_checkable
+class HasY(Protocol):
+    def y(self) -> str: ...
+
+
+class ClassLevelXY:
+    x = "x"
+
+    def y(self) -> str:
+        return "y"
+
+
+@dataclasses.dataclass
+class InstanceLevelXY:
+    x: str
+
+    def y(self) -> str:
+        return "y"
+
+
+class OnlyY:
+    def y(self) -> str:
+        return "y"
@@ -0,0 +1,72 @@
+import itertools
+import tracemalloc
+import typing
+
+import pytest
+from runtime_protocols import ClassLevelXY, HasX, HasY, InstanceLevelXY, OnlyY
+
+from typing_protocol_intersection import ProtocolIntersection, iter_conforming
+
+
+def test_passes_conforming_elements_through():
+    # given
+    elements = [ClassLevelXY(), InstanceLevelXY("x"), ClassLevelXY()]
+    # when
+    checked = list(iter_conforming(ProtocolIntersection[HasX, HasY], elements))
+    # then
+    assert checked == elements
+
+
+def test_raises_at_the_first_nonconforming_element_lazily():
+    # given
+    first, second = ClassLevelXY(), ClassLevelXY()
+    checked = iter_conforming(ProtocolIntersection[HasX, HasY], iter([first, second, OnlyY(), ClassLevelXY()]))
+    # when
+    passed = [next(checked), next(checked)]
+    # then
+    assert passed == [first, second]
+    with pytest.raises(TypeError, match=r"^element 2 is not an instance of .*: OnlyY doesn't conform to .*\.HasX$"):
+        next(checked)
+
+
+def test_skips_nonconforming_elements_unless_strict():
+    # given
+    without_x = InstanceLevelXY("x")
+    del without_x.x
+    elements = [ClassLevelXY(), OnlyY(), InstanceLevelXY("x"), without_x, "xy"]
+    # when
+    checked = list(iter_conforming(ProtocolIntersection[HasX, HasY], elements, strict=False))
+    # then
+    assert checked == [elements[0], elements[2]]
+
+
+def test_checks_every_class_once(inspected_classes: list[type], fresh_xy_intersection: typing.Any):
+    # given
+    elements = [ClassLevelXY(), OnlyY(), InstanceLevelXY("x")] * 100
+    # when
+    list(iter_conforming(fresh_xy_intersection, elements, strict=False))
+    # then
+    assert inspected_classes == [ClassLevelXY, OnlyY, InstanceLevelXY]
+
+
+def test_memory_stays_constant_on_streams():
+    # given
+    intersection = ProtocolIntersection[HasX, HasY]
+    classes = itertools.cycle([ClassLevelXY, OnlyY, lambda: InstanceLevelXY("x")])
+    stream = (next(classes)() for _ in itertools.count())
+    checked = iter_conforming(intersection, stream, strict=False)
+    # when
+    tracemalloc.start()
+    try:
+        for _ in itertools.islice(checked, 10_000):
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # then
+    assert peak < 64 * 1024
+
+
+def test_rejects_anything_but_intersections_right_away():
+    with pytest.raises(TypeError, match=r"^Expected ProtocolIntersection\[\.\.\.\], got <class"):
+        iter_conforming(HasX, [])  # type: ignore[arg-type]
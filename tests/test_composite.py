@@ -0,0 +1,114 @@
+import gc
+import weakref
+from typing import Protocol, runtime_checkable
+
+import pytest
+from runtime_protocols import ClassLevelXY, HasX, HasY, InstanceLevelXY, OnlyY
+
+import typing_protocol_intersection.types
+from typing_protocol_intersection import ProtocolIntersection, composite
+
+
+class HasLen(Protocol):
+    def __len__(self) -> int: ...
+
+
+def test_delegates_protocol_members_to_their_parts():
+    # given
+    x, y = InstanceLevelXY("x"), OnlyY()
+    # when
+    proxy = composite(HasX, HasY)(x, y)
+    # then
+    assert (proxy.x, proxy.y()) == ("x", "y")
+    assert isinstance(proxy, ProtocolIntersection[HasX, HasY])  # pylint: disable=isinstance-second-argument-not-valid-type
+
+
+def test_assignments_and_deletions_go_to_the_parts():
+    # given
+    x = InstanceLevelXY("x")
+    proxy = composite(HasX, HasY)(x, OnlyY())
+    # when
+    proxy.x = "changed"
+    # then
+    assert x.x == "changed"
+    del proxy.x
+    assert not hasattr(x, "x")
+
+
+def test_delegates_special_methods():
+    proxy = composite(HasLen, HasX)([1, 2, 3], InstanceLevelXY("x"))
+    assert len(proxy) == 3
+
+
+def test_members_defined_by_several_protocols_go_to_the_first_part():
+    # given
+    @runtime_checkable
+    class HasXToo(Protocol):
+        x: str
+
+    # when
+    proxy = composite(HasX, HasXToo)(InstanceLevelXY("first"), InstanceLevelXY("second"))
+    # then
+    assert proxy.x == "first"
+
+
+def test_only_protocol_members_are_delegated():
+    # given
+    proxy = composite(HasX, HasY)(ClassLevelXY(), ClassLevelXY())
+    # when
+    with pytest.raises(AttributeError):
+        proxy.z = "z"  # pylint: disable=attribute-defined-outside-init
+    # then
+    assert not hasattr(proxy, "__dict__")
+
+
+def test_classes_are_cached_per_combination_of_protocols():
+    assert composite(HasX, HasY) is composite(HasX, HasY)
+    assert composite(HasY, HasX) is not composite(HasX, HasY)
+    assert composite(HasX, HasY).__intersection__ is ProtocolIntersection[HasX, HasY]
+
+
+def test_classes_of_unused_combinations_can_be_collected():
+    # given
+    @runtime_checkable
+    class Temporary(Protocol):
+        z: str
+
+    proxy_class_ref = weakref.ref(composite(HasX, Temporary))
+    temporary_ref = weakref.ref(Temporary)
+    # when
+    del Temporary
+    # as if it was long since the intersection was last used
+    typing_protocol_intersection.types._intern.cache_clear()  # pylint: disable=protected-access
+    # the protocol is only let go of (by the intersection) once the class is collected, so it takes another collection
+    gc.collect()
+    gc.collect()
+    # then
+    assert proxy_class_ref() is None
+    assert temporary_ref() is None
+
+
+def test_repr_shows_the_parts():
+    # given
+    proxy = composite(HasY)(OnlyY())
+    # when
+    proxy_repr = repr(proxy)
+    # then
+    assert proxy_repr.startswith("Composite[runtime_protocols.HasY](<runtime_protocols.OnlyY object at")
+
+
+def test_takes_a_part_per_protocol():
+    with pytest.raises(TypeError, match=r"takes 2 parts, got 1"):
+        composite(HasX, HasY)(InstanceLevelXY("x"))
+
+
+@pytest.mark.parametrize(
+    ("protocols", "message"),
+    [
+        pytest.param((), "at least one protocol", id="no protocols"),
+        pytest.param((HasX, OnlyY), "Only Protocols can be composed", id="not a protocol"),
+    ],
+)
+def test_takes_protocols_only(protocols: tuple[type, ...], message: str):
+    with pytest.raises(TypeError, match=message):
+        composite(*protocols)
@@ -0,0 +1,154 @@
+import itertools
+import os
+import sys
+import time
+import typing
+from pathlib import Path
+
+import mypy.dmypy_server
+import pytest
+
+HERE = Path(__file__).parent
+
+PROTOCOL_COUNT = 6
+
+PROTOCOLS = """
+from typing import Generic, Protocol, TypeVar
+
+from typing_protocol_intersection import ProtocolIntersection as Has
+
+
+class Z(Protocol):
+    z: int
+
+{protocols}
+
+T = TypeVar("T")
+
+
+class Builder(Generic[T]):
+{methods}
+
+    def build(self) -> T:
+        return self  # type: ignore
+"""
+
+PROTOCOL = """
+class P{i}({bases}Protocol):
+    p{i}: int
+"""
+
+BUILDER_METHOD = """
+    def with_p{i}(self) -> "Builder[Has[T, P{i}]]":
+        return self  # type: ignore
+"""
+
+
+class _Daemon:
+    """Runs dmypy's server in the test process, so that the plugin's state can be inspected."""
+
+    def __init__(self, tmp_path: Path, strip_invisible: typing.Callable[[str], str]) -> None:
+        # pytest puts the repository root on sys.path, which mypy would take for site-packages when running in this
+        # process. dmypy misses edits of the checked files then, so the package is pointed to explicitly instead.
+        options = mypy.dmypy_server.process_start_options(
+            ["--config-file", str(HERE / "test-mypy.ini"), "--no-site-packages"], allow_sources=False
+        )
+        options.mypy_path = [str(HERE.parent)]
+        self._server = mypy.dmypy_server.Server(options, str(tmp_path / "dmypy.json"))
+        self._files = [str(tmp_path / "main.py"), str(tmp_path / "protocols.py")]
+        self._strip_invisible = strip_invisible
+
+    def check(self) -> str:
+        result = self._server.cmd_check(self._files, export_types=False, is_tty=False, terminal_width=120)
+        return self._strip_invisible(str(result["out"]))
+
+    def interned_intersections(self) -> int:
+        # pylint: disable=protected-access
+        assert self._server.fine_grained_manager is not None
+        chain_plugin = self._server.fine_grained_manager.manager.plugin
+        # the plugin is loaded from a path, so its class is a different object than the one that could be imported here
+        (plugin,) = (p for p in chain_plugin._plugins if type(p).__name__ == "ProtocolIntersectionPlugin")
+        return len(plugin._intersections)
+
+
+def _write_protocols(tmp_path: Path, *, extending_z: bool = False, comment: str = "") -> None:
+    bases = "Z, " if extending_z else ""
+    source = PROTOCOLS.format(
+        protocols="\n".join(PROTOCOL.format(i=i, bases=bases) for i in range(PROTOCOL_COUNT)),
+        methods="\n".join(BUILDER_METHOD.format(i=i) for i in range(PROTOCOL_COUNT)),
+    )
+    _write(tmp_path / "protocols.py", f"{source}\n# {comment}\n")
+
+
+def _write_main(tmp_path: Path, body: str) -> None:
+    _write(
+        tmp_path / "main.py",
+        f"import protocols\nfrom typing_protocol_intersection import ProtocolIntersection as Has\n\n\n{body}",
+    )
+
+
+_MTIMES = itertools.count(time.time_ns(), 10**9)
+
+
+def _write(path: Path, contents: str) -> None:
+    path.write_text(contents)
+    # dmypy only looks for changes in files whose size or mtime (in whole seconds) differ
+    mtime = next(_MTIMES)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def _rss() -> int:
+    with open("/proc/self/statm", encoding="ascii") as statm:
+        return int(statm.read().split()[1]) * 4096
+
+
+def test_dmypy_rechecks_intersections_when_their_protocols_change(tmp_path: Path, strip_invisible):
+    # given
+    _write_protocols(tmp_path)
+    _write_main(
+        tmp_path,
+        "def f() -> None:\n"
+        "    protocols.Builder().with_p0().with_p1().build().z\n"
+        "\n\n"
+        "def g(p: Has[protocols.P0, protocols.P1]) -> None:\n"
+        "    p.z\n",
+    )
+    daemon = _Daemon(tmp_path, strip_invisible)
+    assert daemon.check().count('has no attribute "z"') == 2
+    # when
+    # main isn't edited - its intersections need to notice that their members have changed anyway
+    _write_protocols(tmp_path, extending_z=True)
+    # then
+    assert daemon.check().startswith("Success: no issues found")
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads RSS from /proc")
+def test_dmypy_memory_stays_flat_over_many_edits(tmp_path: Path, strip_invisible):
+    # given
+    combinations = itertools.cycle(itertools.combinations(range(PROTOCOL_COUNT), 3))
+    daemon = _Daemon(tmp_path, strip_invisible)
+    warmup_edits, edits = 20, 100
+    interned_intersections = []
+    rss_after_warmup = 0
+    # when
+    for edit in range(warmup_edits + edits):
+        if edit % 10 == 0:
+            _write_protocols(tmp_path, extending_z=edit % 20 == 0, comment=f"edit {edit}")
+        members = next(combinations)
+        chain = "".join(f".with_p{i}()" for i in members)
+        annotation = ", ".join(f"protocols.P{i}" for i in members)
+        _write_main(
+            tmp_path,
+            f"def f() -> int:\n"
+            f"    return protocols.Builder(){chain}.build().p{members[0]}\n"
+            f"\n\n"
+            f"def g(p: Has[{annotation}]) -> int:\n"
+            f"    return p.p{members[-1]}\n",
+        )
+        assert daemon.check().startswith("Success: no issues found")
+        interned_intersections.append(daemon.interned_intersections())
+        if edit == warmup_edits - 1:
+            rss_after_warmup = _rss()
+    # then
+    assert max(interned_intersections[warmup_edits:]) <= max(interned_intersections[:warmup_edits])
+    assert _rss() - rss_after_warmup < 32 * 1024 * 1024
@@ -0,0 +1,129 @@
+import asyncio
+import re
+from typing import Protocol, runtime_checkable
+
+import pytest
+from runtime_protocols import ClassLevelXY, HasX, HasY, OnlyY
+
+import typing_protocol_intersection.types
+from typing_protocol_intersection import ProtocolIntersection, enforce_intersections
+
+
+@enforce_intersections
+def concat(
+    first: ProtocolIntersection[HasX, HasY], /, second: ProtocolIntersection[HasX, HasY], *, third: int = 0
+) -> str:
+    return first.x + second.y() + str(third)
+
+
+@enforce_intersections
+def pick(
+    *candidates: ProtocolIntersection[HasX, HasY], **named: ProtocolIntersection[HasY]
+) -> ProtocolIntersection[HasX, HasY]:
+    return candidates[0] if candidates else next(iter(named.values()))
+
+
+@enforce_intersections
+def consume_defined_later(obj: "ProtocolIntersection[HasX, DefinedLater]") -> None:  # pylint: disable=unused-argument
+    pass
+
+
+@runtime_checkable
+class DefinedLater(Protocol):
+    def y(self) -> str: ...
+
+
+@pytest.mark.parametrize(
+    "call",
+    [
+        pytest.param(lambda: concat(ClassLevelXY(), ClassLevelXY()), id="positional"),
+        pytest.param(lambda: concat(ClassLevelXY(), second=ClassLevelXY(), third=1), id="keyword"),
+        pytest.param(lambda: pick(ClassLevelXY(), ClassLevelXY()), id="variadic positional"),
+        pytest.param(lambda: pick(ClassLevelXY(), other=OnlyY()), id="variadic keyword"),
+    ],
+)
+def test_conforming_arguments_pass(call):
+    call()
+
+
+@pytest.mark.parametrize(
+    ("call", "message"),
+    [
+        pytest.param(lambda: concat(OnlyY(), ClassLevelXY()), "argument 0 of concat()", id="positional only"),
+        pytest.param(lambda: concat(ClassLevelXY(), OnlyY()), "argument 'second' of concat()", id="positional"),
+        pytest.param(lambda: concat(ClassLevelXY(), second=OnlyY()), "argument 'second' of concat()", id="keyword"),
+        pytest.param(lambda: pick(ClassLevelXY(), OnlyY()), "argument 1 of pick()", id="variadic positional"),
+        pytest.param(lambda: pick(ClassLevelXY(), other="y"), "argument 'other' of pick()", id="variadic keyword"),
+        pytest.param(lambda: pick(other=OnlyY()), "return value of pick()", id="return value"),
+    ],
+)
+def test_nonconforming_arguments_and_return_values_are_reported(call, message: str):
+    with pytest.raises(TypeError, match=f"^{re.escape(message)} is not an instance of"):
+        call()
+
+
+def test_reports_the_missing_members():
+    with pytest.raises(TypeError, match=r"OnlyY doesn't conform to .*\.HasX$"):
+        concat(ClassLevelXY(), OnlyY())
+
+
+def test_annotations_are_resolved_on_the_first_call_if_they_are_not_defined_yet():
+    consume_defined_later(ClassLevelXY())
+    with pytest.raises(TypeError, match="argument 'obj'"):
+        consume_defined_later(OnlyY())
+
+
+def test_coroutines_are_checked_once_awaited():
+    # given
+    @enforce_intersections
+    async def consume(obj: ProtocolIntersection[HasX, HasY]) -> ProtocolIntersection[HasX, HasY]:
+        return obj
+
+    # when
+    result = asyncio.run(consume(ClassLevelXY()))
+    # then
+    assert isinstance(result, ClassLevelXY)
+    with pytest.raises(TypeError, match="argument 'obj'"):
+        asyncio.run(consume(OnlyY()))
+
+
+def test_sampling_checks_every_nth_call(monkeypatch: pytest.MonkeyPatch):
+    # given
+    checked_calls = []
+    check_arguments = typing_protocol_intersection.types._SignatureChecker.check_arguments  # pylint: disable=protected-access
+    monkeypatch.setattr(
+        typing_protocol_intersection.types._SignatureChecker,  # pylint: disable=protected-access
+        "check_arguments",
+        lambda self, args, kwargs: checked_calls.append(args[0]) or check_arguments(self, args, kwargs),
+    )
+
+    @enforce_intersections(sample=3)
+    def consume(call: int, obj: ProtocolIntersection[HasX, HasY]) -> None:  # pylint: disable=unused-argument
+        pass
+
+    # when
+    for call in range(7):
+        consume(call, ClassLevelXY())
+    # then
+    assert checked_calls == [0, 3, 6]
+
+
+def test_sampling_rate_has_to_be_positive():
+    with pytest.raises(ValueError, match="sample has to be a positive integer"):
+        enforce_intersections(sample=0)
+
+
+def test_keeps_the_wrapped_function_metadata():
+    assert concat.__name__ == "concat"
+    assert concat.__wrapped__.__name__ == "concat"
+
+
+def test_optional_intersections_can_be_annotated_without_quotes():
+    # given
+    @enforce_intersections
+    def consume(obj: ProtocolIntersection[HasX, HasY] | None = None) -> None:  # pylint: disable=unused-argument
+        pass
+
+    # when
+    consume()
+    consume(ClassLevelXY())
@@ -1,8 +1,17 @@
+import gc
+import itertools
+import tracemalloc
 import typing
 from pathlib import Path
 
+import mypy.build
+import mypy.main
+import mypy.nodes
+import mypy.plugin
+import mypy.types
 import pytest
 
+import typing_protocol_intersection.mypy_intersections
 import typing_protocol_intersection.mypy_plugin
 
 HERE = Path(__file__).parent
@@ -74,6 +83,26 @@ def testcase_file(request, strip_invisible):
             "testcases/protocol_extending_another_builder_happy_path.py",
             id="protocol extending another protocol, passed as a generic param - happy path",
         ),
+        pytest.param(
+            "testcases/inherited_builder_method_happy_path.py",
+            id="methods returning an intersection, inherited from a base class - happy path",
+        ),
+        pytest.param(
+            "testcases/conflicting_members_happy_path.py",
+            id="protocols defining the same member, regardless of their order - happy path",
+        ),
+        pytest.param(
+            "testcases/nested_in_other_types_happy_path.py",
+            id="nested in callables, tuples, unions and generics - happy path",
+        ),
+        pytest.param(
+            "testcases/builder_from_generic_attribute_happy_path.py",
+            id="builder chain from an intersection with members given by type arguments - happy path",
+        ),
+        pytest.param(
+            "testcases/composite_happy_path.py",
+            id="composite proxies are typed as intersections of their protocols - happy path",
+        ),
         # endregion
         # region unhappy paths
         pytest.param(
@@ -84,21 +113,51 @@ def testcase_file(request, strip_invisible):
             "testcases/fails_for_non_protocols.py",
             id="fails when defining a function/method whose return has a non-Protocol base class",
         ),
+        pytest.param(
+            "testcases/fails_for_non_protocols_at_each_call_site.py",
+            id="fails at every call site resolving to the same intersection with a non-Protocol member",
+        ),
         pytest.param("testcases/function_return_type_unhappy_path.py", id="function return type - unhappy path"),
         pytest.param("testcases/multiple_params_unhappy_path.py", id="accepts multiple type parameters - unhappy path"),
         pytest.param(
             "testcases/protocol_extending_another_builder_unhappy_path.py",
             id="protocol extending another protocol, passed as a generic param - unhappy path",
         ),
+        pytest.param(
+            "testcases/normalized_members_unhappy_path.py",
+            id="nested, duplicated and implied members are dropped, the rest is sorted - unhappy path",
+        ),
+        pytest.param(
+            "testcases/enforced_function_unhappy_path.py",
+            id="functions decorated with enforce_intersections keep their signatures - unhappy path",
+        ),
+        pytest.param(
+            "testcases/composite_unhappy_path.py",
+            id="composite proxies take a part per protocol and are typed as intersections - unhappy path",
+        ),
         # endregion
     ],
     indirect=["testcase_file"],
 )
-def test_mypy_plugin(testcase_file: _TestCase, run_mypy):
-    stdout, stderr = run_mypy(testcase_file.path)
+def test_mypy_plugin(testcase_file: _TestCase, testcase_outputs: dict[Path, tuple[str, str]]):
+    stdout, stderr = testcase_outputs[testcase_file.path.resolve()]
     assert (stdout.strip(), stderr.strip()) == (testcase_file.expected_stdout, testcase_file.expected_stderr)
 
 
+@pytest.mark.parametrize(
+    "path",
+    [
+        pytest.param("testcases/multiple_params_happy_path.py", id="no errors"),
+        pytest.param("testcases/fails_for_non_protocols_at_each_call_site.py", id="errors"),
+        pytest.param("testcases/in_generic_param_unhappy_path.py", id="errors with notes"),
+    ],
+)
+def test_batched_testcase_outputs_are_the_same_as_of_separate_runs(
+    path: str, testcase_outputs: dict[Path, tuple[str, str]], run_mypy
+):
+    assert testcase_outputs[(HERE / path).resolve()] == run_mypy(HERE / path)
+
+
 @pytest.mark.parametrize(
     "version",
     [
@@ -139,3 +198,217 @@ def test_initializes_for_supported_mypy_versions(version: str) -> None:
     # when
     _plugin = typing_protocol_intersection.mypy_plugin.plugin(version)
     # then no exception
+
+
+def test_unique_fullnames_differ_for_different_contents() -> None:
+    # when
+    fullnames = [typing_protocol_intersection.mypy_intersections.UniqueFullname("x", [str(i)]) for i in range(10_000)]
+    # then
+    assert len(set(fullnames)) == len(fullnames)
+
+
+def test_unique_fullnames_are_the_same_for_the_same_content_in_any_order() -> None:
+    # when
+    fullname = typing_protocol_intersection.mypy_intersections.UniqueFullname("x", ["mod.X", "mod.Y"])
+    other_fullname = typing_protocol_intersection.mypy_intersections.UniqueFullname("x", ["mod.Y", "mod.X"])
+    # then
+    assert fullname == other_fullname
+
+
+def test_unique_fullname_suffixes_grow_logarithmically() -> None:
+    # given
+    unique_fullname = typing_protocol_intersection.mypy_intersections.UniqueFullname
+    digits_count = len(unique_fullname.INVISIBLE_DIGITS)
+    # when
+    suffix = unique_fullname._invisible_suffix(digits_count**5)  # pylint: disable=protected-access
+    # then
+    assert len(suffix) == 6
+    assert set(suffix) <= set(unique_fullname.INVISIBLE_DIGITS)
+
+
+def test_signature_hook_returns_signatures_without_intersections_untouched() -> None:
+    # given
+    any_type = mypy.types.AnyType(mypy.types.TypeOfAny.special_form)
+    signature = mypy.types.CallableType(
+        arg_types=[
+            any_type,
+            mypy.types.TupleType([any_type], fallback=mypy.types.Instance(_mk_type_info("tuple"), [])),
+        ],
+        arg_kinds=[mypy.nodes.ARG_POS, mypy.nodes.ARG_POS],
+        arg_names=["a", "b"],
+        ret_type=any_type,
+        fallback=mypy.types.Instance(_mk_type_info("function"), []),
+    )
+    arg_types = signature.arg_types
+    context = mypy.plugin.FunctionSigContext(
+        args=[], default_signature=signature, context=mypy.nodes.Context(), api=None
+    )
+    # when
+    result = typing_protocol_intersection.mypy_plugin.intersection_function_signature_hook(
+        context,
+        intersections=typing_protocol_intersection.mypy_intersections.IntersectionCache(max_size=1),
+        settings=typing_protocol_intersection.mypy_plugin.PluginSettings(),
+    )
+    # then
+    assert result is signature
+    assert signature.arg_types is arg_types
+
+
+def test_annotated_and_folded_intersections_of_the_same_members_are_the_same_type() -> None:
+    # given
+    sources, options = mypy.main.process_options(
+        [
+            str(HERE / "testcases" / "multiple_params_happy_path.py"),
+            "--config-file",
+            str(HERE / "test-mypy.ini"),
+            "--no-incremental",
+        ]
+    )
+    options.export_types = True
+    # when
+    result = mypy.build.build(sources, options)
+    # then
+    assert not result.errors
+    type_infos_by_fullname: dict[str, set[int]] = {}
+    for typ in result.types.values():
+        for info in _intersection_type_infos(typ):
+            type_infos_by_fullname.setdefault(info.fullname, set()).add(id(info))
+    # the three intersections built by the builder, the last one passed to a function annotated with the same one
+    assert len(type_infos_by_fullname) == 3
+    assert all(len(ids) == 1 for ids in type_infos_by_fullname.values())
+
+
+def _intersection_type_infos(typ: mypy.types.Type) -> typing.Iterator[mypy.nodes.TypeInfo]:
+    typ = mypy.types.get_proper_type(typ)
+    if isinstance(typ, mypy.types.Instance):
+        if typing_protocol_intersection.mypy_intersections.INTERSECTION_METADATA_KEY in typ.type.metadata:
+            yield typ.type
+        for arg in typ.args:
+            yield from _intersection_type_infos(arg)
+    elif isinstance(typ, mypy.types.CallableType):
+        for component in (*typ.arg_types, typ.ret_type):
+            yield from _intersection_type_infos(component)
+
+
+def _mk_type_info(name: str) -> mypy.nodes.TypeInfo:
+    defn = mypy.nodes.ClassDef(name, mypy.nodes.Block([]))
+    defn.fullname = f"builtins.{name}"
+    return mypy.nodes.TypeInfo(mypy.nodes.SymbolTable(), defn, "builtins")
+
+
+CHAIN_PROTOCOLS = """\
+from typing import Generic, Protocol, TypeVar
+
+from typing_protocol_intersection import ProtocolIntersection as Has
+
+
+class Base(Protocol):
+    shared: int
+
+
+{protocols}
+
+T = TypeVar("T")
+
+
+class Builder(Generic[T]):
+{methods}
+
+    def build(self) -> T:
+        raise NotImplementedError
+"""
+
+
+def test_intersections_extended_along_builder_chains_are_the_same_as_built_from_scratch(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # given
+    order = [3, 0, 5, 1, 4, 2]
+    protocols = "\n\n".join(
+        # every protocol has an attribute of its own and one that all of them define - each with another type
+        f"class P{i}(Base, Protocol):\n    p{i}: int\n    common: {'int' if i % 2 else 'str'}\n"
+        for i in range(len(order))
+    )
+    methods = "\n".join(
+        f'    def with_p{i}(self) -> "Builder[Has[T, P{i}]]":\n        raise NotImplementedError\n'
+        for i in range(len(order))
+    )
+    (tmp_path / "protocols.py").write_text(CHAIN_PROTOCOLS.format(protocols=protocols, methods=methods))
+    chain = "".join(f".with_p{i}()" for i in order)
+    (tmp_path / "chain.py").write_text(f"import protocols\n\nbuilt = protocols.Builder(){chain}.build()\n")
+    members = ", ".join(f"protocols.P{i}" for i in range(len(order)))
+    (tmp_path / "annotated.py").write_text(
+        "import protocols\nfrom typing_protocol_intersection import ProtocolIntersection as Has\n\n"
+        f"def f(obj: Has[{members}]) -> None: ...\n"
+    )
+    # the plugin is imported by name, so that it's this very module that's spied on
+    config_file = tmp_path / "mypy.ini"
+    config_file.write_text("[mypy]\nplugins = typing_protocol_intersection.mypy_plugin\n")
+    built_from_scratch = []
+    mk_intersection_typeinfo = typing_protocol_intersection.mypy_intersections._mk_intersection_typeinfo  # pylint: disable=protected-access
+    monkeypatch.setattr(
+        typing_protocol_intersection.mypy_intersections,
+        "_mk_intersection_typeinfo",
+        lambda module, members: built_from_scratch.append(module.fullname) or mk_intersection_typeinfo(module, members),
+    )
+    sources, options = mypy.main.process_options(
+        [str(tmp_path / name) for name in ("protocols.py", "chain.py", "annotated.py")]
+        + ["--config-file", str(config_file), "--no-incremental"]
+    )
+    # when
+    result = mypy.build.build(sources, options)
+    # then
+    assert not result.errors
+    # only the first step of the chain, folded from an intersection with a type variable, is built from scratch
+    assert built_from_scratch.count("chain") == 1
+    extended, from_scratch = (_widest_intersection(result.graph[module].tree) for module in ("chain", "annotated"))
+    assert extended.fullname[len("chain") :] == from_scratch.fullname[len("annotated") :]
+    assert set(extended.mro[1:]) == set(from_scratch.mro[1:])
+    assert {name: symbol.node for name, symbol in extended.names.items()} == {
+        name: symbol.node for name, symbol in from_scratch.names.items()
+    }
+
+
+def _widest_intersection(module: mypy.nodes.MypyFile | None) -> mypy.nodes.TypeInfo:
+    assert module is not None
+    intersections = [
+        symbol.node
+        for symbol in module.names.values()
+        if isinstance(symbol.node, mypy.nodes.TypeInfo)
+        and typing_protocol_intersection.mypy_intersections.INTERSECTION_METADATA_KEY in symbol.node.metadata
+    ]
+    return max(intersections, key=lambda info: len(info.mro))
+
+
+def test_intersection_cache_memory_stays_bounded(mk_module, mk_protocol_type_info) -> None:
+    # given
+    cache_size = 32
+    intersections = typing_protocol_intersection.mypy_intersections.IntersectionCache(max_size=cache_size)
+    protocols = [mypy.types.Instance(mk_protocol_type_info(f"P{i}"), []) for i in range(12)]
+    combinations = itertools.cycle(itertools.combinations(protocols, 3))
+    warmup_modules, modules = 20, 200
+
+    def check_module(index: int) -> None:
+        # the module (and so its symbol table) is dropped afterwards, like mypy would drop it if it wasn't needed
+        module = mk_module(f"module_{index}")
+        for _ in range(10):
+            intersections.get(module, list(next(combinations)))
+
+    tracemalloc.start()
+    try:
+        # when
+        for index in range(warmup_modules):
+            check_module(index)
+        # TypeInfos reference themselves through their MROs, so are only freed by the cycle collector
+        gc.collect()
+        after_warmup, _ = tracemalloc.get_traced_memory()
+        for index in range(warmup_modules, warmup_modules + modules):
+            check_module(index)
+        gc.collect()
+        after_all, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # then
+    assert len(intersections) == cache_size
+    # an unbounded cache would keep 2000 intersections more, which takes megabytes
+    assert after_all - after_warmup < 64 * 1024
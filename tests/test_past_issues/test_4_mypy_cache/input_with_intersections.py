@@ -0,0 +1,34 @@
+from typing import Generic, Protocol, TypeVar
+
+from typing_protocol_intersection import ProtocolIntersection as Has
+
+
+class X(Protocol):  # pylint: disable=invalid-name
+    x: str
+
+
+class Y(Protocol):  # pylint: disable=invalid-name
+    y: str
+
+
+T = TypeVar("T")
+
+
+class Builder(Generic[T]):
+    def with_x(self) -> "Builder[Has[T, X]]":
+        return self  # type: ignore
+
+    def with_y(self) -> "Builder[Has[T, Y]]":
+        return self  # type: ignore
+
+    def build(self) -> T:
+        return self  # type: ignore
+
+
+def get_x_y(xy: Has[X, Y]) -> str:
+    return xy.x + xy.y
+
+
+# a module-level variable, so that a folded intersection is written to the cache too
+built = Builder().with_x().with_y().build()
+get_x_y(built)
@@ -2,10 +2,26 @@
 ref: https://github.com/klausweiss/typing-protocol-intersection/issues/4
 """
 
+import re
 from pathlib import Path
 
 HERE = Path(__file__).parent
 
+# mypy logs (with -v) every module it has to check again; fresh, cache-loaded modules are not reported this way
+RECHECKED_MODULE_LOG = re.compile(
+    r"^LOG: +(?:Processing|Scheduling) SCC (?:singleton|of size \d+) \((.*)\) as .*stale", re.MULTILINE
+)
+
+DEPENDENT_MODULE = """
+import lib
+
+reveal_type(lib.built)
+lib.built.z
+built_here = lib.Builder().with_x().with_y().build()
+built_here.z
+lib.get_x_y(lib.Builder().with_x().build())
+"""
+
 
 def test_4_mypy_cache(run_mypy):
     # given
@@ -16,3 +32,36 @@ def test_4_mypy_cache(run_mypy):
     for _ in range(4):
         run_mypy(input_file, no_incremental=False)
     # then no error
+
+
+def test_4_warm_cache_rechecks_no_modules(run_mypy, tmp_path: Path):
+    # given
+    # Older mypy versions always recheck modules with errors, so the input needs to type check.
+    input_file = HERE / "input_with_intersections.py"
+    args = ["--cache-dir", str(tmp_path), "--verbose"]
+    cold_stdout, cold_stderr = run_mypy(input_file, no_incremental=False, extra_args=args)
+    assert RECHECKED_MODULE_LOG.search(cold_stderr)
+    # when
+    warm_stdout, warm_stderr = run_mypy(input_file, no_incremental=False, extra_args=args)
+    # then
+    assert RECHECKED_MODULE_LOG.findall(warm_stderr) == []
+    assert warm_stdout == cold_stdout == "Success: no issues found in 1 source file"
+
+
+def test_4_intersections_are_loaded_from_cache_by_dependent_modules(run_mypy, tmp_path: Path):
+    # given
+    # In the warm run only main is checked - intersections from lib need to be deserialized from the cache.
+    lib_file = tmp_path / "lib.py"
+    lib_file.write_text((HERE / "input_with_intersections.py").read_text())
+    main_file = tmp_path / "main.py"
+    main_file.write_text(DEPENDENT_MODULE)
+    args = ["--cache-dir", str(tmp_path / "cache"), "--verbose"]
+    cold_stdout, _ = run_mypy(main_file, no_incremental=False, extra_args=args)
+    main_file.write_text(DEPENDENT_MODULE + "# changed\n")
+    # when
+    warm_stdout, warm_stderr = run_mypy(main_file, no_incremental=False, extra_args=args)
+    # then
+    assert RECHECKED_MODULE_LOG.findall(warm_stderr) == ["main"]
+    assert warm_stdout == cold_stdout
+    assert 'Revealed type is "lib.ProtocolIntersection[lib.X, lib.Y]"' in warm_stdout
+    assert '"ProtocolIntersection[X]"; expected "ProtocolIntersection[X, Y]"' in warm_stdout
@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from typing_protocol_intersection.mypy_profiling import PROFILE_ENV_VAR
+
+HERE = Path(__file__).parent
+
+
+def _run_mypy(input_file: Path, env: dict[str, str]) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(  # noqa: S603 - runs this interpreter with fixed arguments
+        [
+            sys.executable,
+            "-m",
+            "mypy",
+            str(input_file),
+            "--config-file",
+            str(HERE / "test-mypy.ini"),
+            "--no-incremental",
+        ],
+        cwd=HERE.parent,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+def test_profile_report_is_written_at_exit(tmp_path: Path):
+    # given
+    report_path = tmp_path / "profile.json"
+    # when
+    result = _run_mypy(HERE / "testcases" / "multiple_params_happy_path.py", {PROFILE_ENV_VAR: str(report_path)})
+    # then
+    assert result.stdout.startswith("Success: no issues found"), result.stdout + result.stderr
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert report["calls"]["intersection_function_signature_hook"] > 0
+    assert report["folds"] == report["calls"]["fold_intersection"] > 0
+    assert set(report["seconds"]) == set(report["calls"])
+    assert report["intersections_created"] > 0
+    assert report["widest_intersection"] == 3
+    assert report["deepest_intersection"] == 2
@@ -1,10 +1,21 @@
-from typing import NamedTuple
+# pylint: disable=isinstance-second-argument-not-valid-type
+import copy
+import gc
+import pickle
+import typing
+import weakref
+from typing import NamedTuple, runtime_checkable
+
+import pytest
 
 try:
     from typing import Protocol
 except ImportError:
     from typing_extensions import Protocol
 
+from runtime_protocols import ClassLevelXY, HasX, HasY, InstanceLevelXY, OnlyY
+
+import typing_protocol_intersection.types
 from typing_protocol_intersection import ProtocolIntersection
 
 
@@ -27,3 +38,237 @@ def test_does_not_break_in_runtime():
         return intersection.x + intersection.y + intersection.z
 
     assert concat_fields(XYZ("x", "y", "z")) == "xyz"
+
+
+@pytest.mark.parametrize(
+    ("obj", "expected"),
+    [
+        pytest.param(ClassLevelXY(), True, id="members defined by the class"),
+        pytest.param(InstanceLevelXY("x"), True, id="members defined by the instance"),
+        pytest.param(OnlyY(), False, id="some members missing"),
+        pytest.param("xy", False, id="all members missing"),
+    ],
+)
+def test_isinstance_checks_all_member_protocols(obj: object, expected: bool):
+    assert isinstance(obj, ProtocolIntersection[HasX, HasY]) is expected
+
+
+def test_isinstance_checks_instances_of_the_same_class_one_by_one_where_needed():
+    # given
+    with_x, without_x = InstanceLevelXY("x"), InstanceLevelXY("x")
+    del without_x.x
+    # when
+    verdicts = [isinstance(obj, ProtocolIntersection[HasX, HasY]) for obj in (with_x, without_x)]
+    # then
+    assert verdicts == [True, False]
+
+
+def test_issubclass_checks_all_member_protocols():
+    assert issubclass(OnlyY, ProtocolIntersection[HasY])
+    assert not issubclass(str, ProtocolIntersection[HasY])
+
+
+def test_isinstance_requires_runtime_checkable_protocols():
+    # given
+    class NotRuntimeCheckable(Protocol):
+        x: str
+
+    # when
+    with pytest.raises(TypeError, match="runtime_checkable"):
+        isinstance(ClassLevelXY(), ProtocolIntersection[HasY, NotRuntimeCheckable])
+
+
+def test_isinstance_verdicts_are_cached_per_class(inspected_classes: list[type], fresh_xy_intersection: typing.Any):
+    # when
+    for obj in (ClassLevelXY(), ClassLevelXY(), OnlyY(), ClassLevelXY(), OnlyY()):
+        isinstance(obj, fresh_xy_intersection)
+    # then
+    assert inspected_classes == [ClassLevelXY, OnlyY]
+
+
+def test_classes_checked_against_intersections_can_be_collected():
+    # given
+    intersection = ProtocolIntersection[HasX, HasY]
+
+    class Temporary(ClassLevelXY):
+        pass
+
+    assert isinstance(Temporary(), intersection)
+    assert issubclass(Temporary, ProtocolIntersection[HasY])
+    temporary_ref = weakref.ref(Temporary)
+    # when
+    del Temporary
+    gc.collect()
+    # then
+    assert temporary_ref() is None
+
+
+def test_annotations_with_intersections_can_be_resolved():
+    # given
+    def consume(obj: "ProtocolIntersection[HasX, HasY]") -> None:  # pylint: disable=unused-argument
+        pass
+
+    # when
+    hints = typing.get_type_hints(consume)
+    # then
+    assert isinstance(ClassLevelXY(), hints["obj"])
+
+
+def test_optional_annotations_with_intersections_can_be_resolved():
+    # given
+    def consume(obj: "ProtocolIntersection[HasX, HasY] | None") -> None:  # pylint: disable=unused-argument
+        pass
+
+    # when
+    hints = typing.get_type_hints(consume)
+    # then
+    assert _union_args(hints["obj"]) == (ProtocolIntersection[HasX, HasY], type(None))
+
+
+def test_intersections_make_unions_with_other_types():
+    # given
+    intersection = ProtocolIntersection[HasX, HasY]
+    # then
+    assert _union_args(intersection | None) == (intersection, type(None))
+    assert _union_args(None | intersection) == (type(None), intersection)
+    assert _union_args(int | intersection) == (int, intersection)
+    assert _union_args(intersection | ProtocolIntersection[HasX]) == (intersection, ProtocolIntersection[HasX])
+
+
+def _union_args(union: object) -> tuple[object, ...]:
+    assert typing.get_origin(union) is typing.Union
+    return typing.get_args(union)
+
+
+def test_intersections_expose_their_members():
+    # when
+    intersection = ProtocolIntersection[HasX, HasY]
+    # then
+    assert intersection.__origin__ is ProtocolIntersection
+    assert intersection.__args__ == (HasX, HasY)
+    assert ProtocolIntersection[HasX].__args__ == (HasX,)
+    assert repr(intersection) == (
+        "typing_protocol_intersection.ProtocolIntersection[runtime_protocols.HasX, runtime_protocols.HasY]"
+    )
+
+
+def test_intersections_are_interned():
+    # given
+    intersection = ProtocolIntersection[HasX, HasY]
+    # when
+    resolved = typing.get_type_hints(_consume_xy)["obj"]
+    # then
+    assert ProtocolIntersection[HasX, HasY] is intersection
+    assert resolved is intersection
+    assert ProtocolIntersection[HasY, HasX] is not intersection
+
+
+def test_intersections_are_hashable():
+    # given
+    verdicts = {ProtocolIntersection[HasX, HasY]: True, ProtocolIntersection[HasX]: False}
+    # when
+    verdict = verdicts[ProtocolIntersection[HasX, HasY]]
+    # then
+    assert verdict is True
+    assert hash(ProtocolIntersection[HasX]) == hash(ProtocolIntersection[HasX])
+
+
+def test_intersections_with_unhashable_members_are_not_interned():
+    # when
+    intersection = ProtocolIntersection[HasX, [HasY]]
+    # then
+    assert intersection == ProtocolIntersection[HasX, [HasY]]
+    assert intersection is not ProtocolIntersection[HasX, [HasY]]
+    with pytest.raises(TypeError, match="unhashable"):
+        hash(intersection)
+
+
+def test_recently_used_intersections_are_kept_alive():
+    # given
+    @runtime_checkable
+    class HasFreshY(HasY, Protocol):
+        pass
+
+    intersection_ref = weakref.ref(ProtocolIntersection[HasX, HasFreshY])
+    # when
+    isinstance(ClassLevelXY(), ProtocolIntersection[HasX, HasFreshY])
+    gc.collect()
+    # then
+    assert intersection_ref() is ProtocolIntersection[HasX, HasFreshY]
+    assert ClassLevelXY in intersection_ref()._class_checks  # pylint: disable=protected-access
+
+
+def test_intersections_out_of_use_do_not_keep_their_members_alive():
+    # given
+    @runtime_checkable
+    class Temporary(Protocol):
+        x: str
+
+    intersection_ref = weakref.ref(ProtocolIntersection[HasX, Temporary])
+    temporary_ref = weakref.ref(Temporary)
+    # when
+    del Temporary
+    # as if it was long since the intersection was last used
+    typing_protocol_intersection.types._intern.cache_clear()  # pylint: disable=protected-access
+    gc.collect()
+    # then
+    assert intersection_ref() is None
+    assert temporary_ref() is None
+
+
+def test_intersections_in_use_keep_their_identity():
+    # given
+    intersection = ProtocolIntersection[HasX, HasY]
+    # when
+    typing_protocol_intersection.types._intern.cache_clear()  # pylint: disable=protected-access
+    # then
+    assert ProtocolIntersection[HasX, HasY] is intersection
+
+
+@pytest.mark.parametrize(
+    "clone",
+    [
+        pytest.param(lambda alias: pickle.loads(pickle.dumps(alias)), id="pickle"),  # noqa: S301 - pickled right here
+        pytest.param(copy.copy, id="copy"),
+        pytest.param(copy.deepcopy, id="deepcopy"),
+    ],
+)
+def test_copies_of_intersections_are_the_interned_intersections(clone):
+    assert clone(ProtocolIntersection[HasX, HasY]) is ProtocolIntersection[HasX, HasY]
+
+
+def _consume_xy(obj: "ProtocolIntersection[HasX, HasY]") -> None:  # pylint: disable=unused-argument
+    pass
+
+
+class WithOwnAttributes:
+    def __init__(self, **attributes: object) -> None:
+        self.__dict__.update(attributes)
+
+
+class HidingX(WithOwnAttributes):
+    def __getattribute__(self, name: str) -> object:
+        if name == "x":
+            raise AttributeError(name)
+        return super().__getattribute__(name)
+
+
+class WithFailingXProperty(WithOwnAttributes):
+    @property
+    def x(self) -> str:
+        raise AttributeError("x")
+
+
+@pytest.mark.parametrize("cls", [WithOwnAttributes, HidingX, WithFailingXProperty])
+@pytest.mark.parametrize(
+    "attributes",
+    [{}, {"x": "x"}, {"x": None}, {"x": "x", "y": None}, {"x": "x", "y": lambda: "y"}],
+    ids=["none", "x", "x=None", "x, y=None", "x, y"],
+)
+def test_isinstance_checks_of_instance_attributes_agree_with_member_protocols(cls: type, attributes: dict):
+    # given
+    obj = cls(**attributes)
+    # when
+    verdict = isinstance(obj, ProtocolIntersection[HasX, HasY])
+    # then
+    assert verdict is (isinstance(obj, HasX) and isinstance(obj, HasY))
@@ -0,0 +1,199 @@
+from pathlib import Path
+
+import mypy.api
+import mypy.options
+import pytest
+
+from typing_protocol_intersection import mypy_plugin
+from typing_protocol_intersection.mypy_plugin import PluginSettings, ProtocolIntersectionPlugin
+
+HERE = Path(__file__).parent
+PLUGIN_PATH = HERE.parent / "typing_protocol_intersection" / "mypy_plugin.py"
+
+
+def test_settings_default_without_config_file():
+    assert PluginSettings.from_config_file(None) == PluginSettings()
+
+
+def test_settings_default_without_plugin_section(tmp_path: Path):
+    # given
+    config_file = tmp_path / "mypy.ini"
+    config_file.write_text("[mypy]\nstrict = True\n")
+    # when
+    settings = PluginSettings.from_config_file(str(config_file))
+    # then
+    assert settings == PluginSettings()
+
+
+def test_settings_are_read_from_ini(tmp_path: Path):
+    # given
+    config_file = tmp_path / "mypy.ini"
+    config_file.write_text(
+        "[mypy]\n\n[typing_protocol_intersection]\nnormalize = False\nprofile = report.json\nmax_width = 8\n"
+    )
+    # when
+    settings = PluginSettings.from_config_file(str(config_file))
+    # then
+    assert settings == PluginSettings(normalize=False, profile="report.json", max_width=8)
+
+
+def test_settings_are_read_from_pyproject(tmp_path: Path):
+    # given
+    config_file = tmp_path / "pyproject.toml"
+    config_file.write_text(
+        '[tool.mypy]\n\n[tool.typing_protocol_intersection]\nnormalize = false\nprofile = "r.json"\nmax_depth = 4\n'
+    )
+    # when
+    settings = PluginSettings.from_config_file(str(config_file))
+    # then
+    assert settings == PluginSettings(normalize=False, profile="r.json", max_depth=4)
+
+
+@pytest.mark.parametrize(
+    ("section", "error"),
+    [
+        pytest.param("normalise = false", "Unknown setting 'normalise'", id="unknown setting"),
+        pytest.param("normalize = sometimes", "Invalid 'normalize'", id="invalid value"),
+        pytest.param("max_width = 0", "Invalid 'max_width'", id="non-positive limit"),
+        pytest.param("max_depth = deep", "Invalid 'max_depth'", id="non-integer limit"),
+    ],
+)
+def test_settings_fail_loudly_for_mistakes(tmp_path: Path, section: str, error: str):
+    # given
+    config_file = tmp_path / "mypy.ini"
+    config_file.write_text(f"[mypy]\n\n[typing_protocol_intersection]\n{section}\n")
+    # when
+    with pytest.raises(ValueError, match=error):
+        PluginSettings.from_config_file(str(config_file))
+
+
+def test_only_settings_affecting_type_checking_invalidate_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    # given
+    # the reports would be written at exit otherwise
+    monkeypatch.setattr(mypy_plugin, "enable_profiling", lambda report_path: None)
+    config_data = []
+    sections = (
+        "",
+        "profile = one.json",
+        "profile = other.json",
+        "cache_size = 8",
+        "normalize = false",
+        "max_depth = 4",
+    )
+    for section in sections:
+        config_file = tmp_path / "mypy.ini"
+        config_file.write_text(f"[mypy]\n\n[typing_protocol_intersection]\n{section}\n")
+        options = mypy.options.Options()
+        options.config_file = str(config_file)
+        # when
+        config_data.append(ProtocolIntersectionPlugin(options).report_config_data(None))  # type: ignore[arg-type]
+    # then
+    assert config_data[0] == config_data[1] == config_data[2] == config_data[3]
+    assert len({str(data) for data in [config_data[0], *config_data[4:]]}) == len(sections) - 3
+
+
+def test_members_are_taken_as_written_unless_normalized(tmp_path: Path, strip_invisible):
+    # given
+    config_file = tmp_path / "mypy.ini"
+    config_file.write_text(f"[mypy]\nplugins = {PLUGIN_PATH}\n\n[typing_protocol_intersection]\nnormalize = false\n")
+    (tmp_path / "example.py").write_text(
+        "from typing import Protocol\n"
+        "from typing_protocol_intersection import ProtocolIntersection as Has\n"
+        "class X(Protocol):\n"
+        "    x: int\n"
+        "class Y(Protocol):\n"
+        "    y: int\n"
+        "def f(obj: Has[Y, X, Y]) -> None:\n"
+        "    reveal_type(obj)\n"
+    )
+    # when
+    stdout, _, _ = mypy.api.run([str(tmp_path / "example.py"), "--config-file", str(config_file), "--no-incremental"])
+    # then
+    assert "ProtocolIntersection[example.Y, example.X, example.Y]" in strip_invisible(stdout)
+
+
+LIMITS_EXAMPLE = """\
+from typing import Generic, Protocol, TypeVar
+from typing_protocol_intersection import ProtocolIntersection as Has
+T = TypeVar("T")
+class X(Protocol):
+    x: int
+class Y(Protocol):
+    y: int
+class Z(Protocol):
+    z: int
+class Builder(Generic[T]):
+    def with_x(self) -> "Builder[Has[T, X]]": raise NotImplementedError
+    def with_y(self) -> "Builder[Has[T, Y]]": raise NotImplementedError
+    def with_z(self) -> "Builder[Has[T, Z]]": raise NotImplementedError
+    def build(self) -> T: raise NotImplementedError
+def within_limits(obj: Has[X, Y]) -> None: ...
+def too_wide(obj: Has[X, Y, Z]) -> None: ...
+def too_deep(obj: Has[Has[Has[X]]]) -> None: ...
+reveal_type(Builder().with_x().with_y().build())
+reveal_type(Builder().with_x().with_y().with_z().build())
+"""
+
+
+@pytest.mark.parametrize(
+    ("normalize", "revealed_type"),
+    [
+        pytest.param("true", "example.ProtocolIntersection[example.X, example.Y]", id="normalized"),
+        pytest.param("false", "example.ProtocolIntersection[example.Y, example.X]", id="as written"),
+    ],
+)
+def test_intersections_over_the_limits_are_reported(
+    tmp_path: Path, strip_invisible, normalize: str, revealed_type: str
+):
+    # given
+    config_file = tmp_path / "mypy.ini"
+    config_file.write_text(
+        f"[mypy]\nplugins = {PLUGIN_PATH}\n\n[typing_protocol_intersection]\nmax_width = 2\nmax_depth = 2\n"
+        f"normalize = {normalize}\n"
+    )
+    (tmp_path / "example.py").write_text(LIMITS_EXAMPLE)
+    # when
+    stdout, _, _ = mypy.api.run([str(tmp_path / "example.py"), "--config-file", str(config_file), "--no-incremental"])
+    # then
+    lines = [line.split(": ", maxsplit=1)[1] for line in strip_invisible(stdout).splitlines() if ": " in line]
+    assert lines == [
+        "error: ProtocolIntersection of more than 2 protocols (see max_width in the [typing_protocol_intersection]"
+        " config section).  [intersection-limit]",
+        "error: ProtocolIntersection nested more than 2 levels deep (see max_depth in the"
+        " [typing_protocol_intersection] config section).  [intersection-limit]",
+        f'note: Revealed type is "{revealed_type}"',
+        # every link of a chain is folded on its own, so it's the width that grows with the chain
+        "error: ProtocolIntersection of more than 2 protocols (see max_width in the [typing_protocol_intersection]"
+        " config section).  [intersection-limit]",
+        'note: Revealed type is "Any"',
+    ]
+
+
+def test_intersections_dropped_from_the_cache_are_reused(tmp_path: Path, strip_invisible):
+    # given
+    config_file = tmp_path / "mypy.ini"
+    config_file.write_text(f"[mypy]\nplugins = {PLUGIN_PATH}\n\n[typing_protocol_intersection]\ncache_size = 1\n")
+    (tmp_path / "lib.py").write_text(
+        "from typing import Protocol\n"
+        "from typing_protocol_intersection import ProtocolIntersection as Has\n"
+        "class X(Protocol):\n"
+        "    x: int\n"
+        "class Y(Protocol):\n"
+        "    y: int\n"
+        "class Z(Protocol):\n"
+        "    z: int\n"
+        "def f(a: Has[X, Y]) -> None: ...\n"
+        "def g(b: Has[X, Z]) -> None: ...\n"
+        "v1: Has[X, Y]\n"
+        # drops the intersection of X and Y from the cache, before it's needed again
+        "v2: Has[X, Z]\n"
+        "v3: Has[X, Y]\n"
+    )
+    (tmp_path / "example.py").write_text("import lib\nreveal_type([lib.v1, lib.v3])\nlib.f(lib.v3)\n")
+    # when
+    stdout, stderr, exit_code = mypy.api.run(
+        [str(tmp_path / "example.py"), "--config-file", str(config_file), "--no-incremental"]
+    )
+    # then
+    assert (stderr, exit_code) == ("", 0)
+    assert 'list[lib.ProtocolIntersection[lib.X, lib.Y]]"' in strip_invisible(stdout)
@@ -0,0 +1,85 @@
+import itertools
+import random
+import sys
+import threading
+from pathlib import Path
+
+import mypy.nodes
+import mypy.types
+import pytest
+
+from typing_protocol_intersection.mypy_intersections import IntersectionCache, mk_protocol_intersection_typeinfo
+from typing_protocol_intersection.mypy_plugin import PluginSettings
+from typing_protocol_intersection.mypy_profiling import PluginProfile
+
+THREADS = 16
+PROTOCOL_COUNT = 8
+MODULE_COUNT = 3
+
+
+@pytest.fixture(autouse=True)
+def frequent_thread_switches():
+    # switching threads as often as possible makes races show up way sooner
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(switch_interval)
+
+
+@pytest.fixture
+def profile(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> PluginProfile:
+    profile = PluginProfile(str(tmp_path / "profile.json"))
+    monkeypatch.setattr(PluginProfile, "active", profile)
+    return profile
+
+
+def test_intersections_built_from_many_threads_keep_their_identities(
+    profile: PluginProfile, mk_module, mk_protocol_type_info
+):
+    # given
+    intersections = IntersectionCache(PluginSettings().cache_size)
+    modules = [mk_module(f"module_{i}") for i in range(MODULE_COUNT)]
+    protocols = [mypy.types.Instance(mk_protocol_type_info(f"P{i}"), []) for i in range(PROTOCOL_COUNT)]
+    member_sets = [list(members) for width in (1, 2, 3) for members in itertools.combinations(protocols, width)]
+    # the annotation of a builder method, like Has[T, P0] - T gets substituted with an already folded intersection
+    annotation = mk_protocol_intersection_typeinfo("ProtocolIntersection", module=mk_module("builder"), content=[])
+    results: list[dict[tuple[str, frozenset[mypy.types.Instance]], mypy.nodes.TypeInfo]] = [{} for _ in range(THREADS)]
+    barrier = threading.Barrier(THREADS)
+
+    def fold_all(thread: int) -> None:
+        work = [(module, members) for module in modules for members in member_sets]
+        random.Random(thread).shuffle(work)  # noqa: S311
+        barrier.wait()
+        for module, members in work:
+            type_info = intersections.get(module, members)
+            results[thread][module.fullname, frozenset(members)] = type_info
+            for extra in protocols:
+                folded = mypy.types.Instance(type_info, members)
+                extended = intersections.extend(
+                    module, mypy.types.Instance(annotation, [folded, extra]), max_width=PROTOCOL_COUNT
+                )
+                if extended is not None:
+                    extended_type_info, extended_members = extended
+                    results[thread][module.fullname, frozenset(extended_members)] = extended_type_info
+
+    threads = [threading.Thread(target=fold_all, args=(thread,)) for thread in range(THREADS)]
+    # when
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # then
+    # every thread got the very same intersection for the same members in the same module...
+    assert all(result == results[0] for result in results)
+    type_infos = list(results[0].values())
+    # ...and no two intersections share an identity - neither the TypeInfo, nor the name
+    assert len({id(type_info) for type_info in type_infos}) == len(type_infos)
+    assert len({type_info.fullname for type_info in type_infos}) == len(type_infos)
+    assert all(_module(modules, type_info).names[type_info.name].node is type_info for type_info in type_infos)
+    # nothing was built twice, and no update of the profile got lost
+    assert profile.intersections_created == len(type_infos)
+
+
+def _module(modules: list[mypy.nodes.MypyFile], type_info: mypy.nodes.TypeInfo) -> mypy.nodes.MypyFile:
+    (module,) = (module for module in modules if module.fullname == type_info.module_name)
+    return module
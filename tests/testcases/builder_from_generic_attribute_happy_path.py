@@ -0,0 +1,48 @@
+from typing import Generic, Protocol, TypeVar
+
+from typing_protocol_intersection import ProtocolIntersection
+
+
+class HasX(Protocol):
+    x: str
+
+
+class HasY(Protocol):
+    y: str
+
+
+class HasZ(Protocol):
+    z: str
+
+
+_T = TypeVar("_T")
+
+
+class Builder(Generic[_T]):
+    def with_z(self) -> "Builder[ProtocolIntersection[_T, HasZ]]":
+        return self  # type: ignore
+
+    def build(self) -> _T:
+        return self  # type: ignore
+
+
+def builder_from(obj: _T) -> Builder[_T]:  # pylint: disable=unused-argument
+    return Builder()
+
+
+class Wrapper(Generic[_T]):
+    # an intersection with a member that's only known once the wrapper is parametrized
+    attr: ProtocolIntersection[_T, HasX]
+
+
+def get_x_y_z(obj: ProtocolIntersection[HasX, HasY, HasZ]) -> str:
+    return obj.x + obj.y + obj.z
+
+
+def main(wrapper: Wrapper[HasY]) -> None:
+    built = builder_from(wrapper.attr).with_z().build()
+    get_x_y_z(built)
+
+
+# expected stdout
+# Success: no issues found in 1 source file
@@ -0,0 +1,43 @@
+from typing import Protocol
+
+from typing_protocol_intersection import ProtocolIntersection, composite
+
+
+class HasX(Protocol):
+    x: str
+
+
+class HasY(Protocol):
+    def y(self) -> str: ...
+
+
+class X:
+    x = "x"
+
+
+class Y:
+    def y(self) -> str:
+        return "y"
+
+
+def get_x_y(obj: ProtocolIntersection[HasX, HasY]) -> str:
+    return obj.x + obj.y()
+
+
+def main() -> None:
+    proxy = composite(HasX, HasY)(X(), Y())
+    get_x_y(proxy)
+    # the order of protocols doesn't matter for the intersection, only for the order of the parts
+    get_x_y(composite(HasY, HasX)(Y(), X()))
+    proxy_class = composite(HasY, HasX)
+    get_x_y(proxy_class(Y(), X()))
+    print(proxy.x + proxy.y())
+
+
+def compose_all(protocols: tuple[type, ...]) -> object:
+    # protocols unpacked into composite are only known at runtime, so the call isn't checked any further
+    return composite(*protocols)
+
+
+# expected stdout
+# Success: no issues found in 1 source file
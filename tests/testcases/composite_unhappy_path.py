@@ -0,0 +1,46 @@
+from typing import Protocol
+
+from typing_protocol_intersection import ProtocolIntersection, composite
+
+
+class HasX(Protocol):
+    x: str
+
+
+class HasY(Protocol):
+    def y(self) -> str: ...
+
+
+class HasZ(Protocol):
+    z: str
+
+
+class X:
+    x = "x"
+
+
+class Y:
+    def y(self) -> str:
+        return "y"
+
+
+def get_x_y_z(obj: ProtocolIntersection[HasX, HasY, HasZ]) -> str:
+    return obj.x + obj.y() + obj.z
+
+
+def main() -> None:
+    composite(HasX, HasY)(Y(), X())
+    composite(HasX, HasY)(X())
+    get_x_y_z(composite(HasX, HasY)(X(), Y()))
+    composite(HasX, Y)
+
+
+# expected stdout
+# tests/testcases/composite_unhappy_path.py:32:27: error: Argument 1 has incompatible type "Y"; expected "HasX"  [arg-type]
+# tests/testcases/composite_unhappy_path.py:32:32: error: Argument 2 has incompatible type "X"; expected "HasY"  [arg-type]
+# tests/testcases/composite_unhappy_path.py:33:5: error: Too few arguments  [call-arg]
+# tests/testcases/composite_unhappy_path.py:34:15: error: Argument 1 to "get_x_y_z" has incompatible type "ProtocolIntersection[HasX, HasY]"; expected "ProtocolIntersection[HasX, HasY, HasZ]"  [arg-type]
+# tests/testcases/composite_unhappy_path.py:34:15: note: "ProtocolIntersection" is missing following "ProtocolIntersection" protocol member:
+# tests/testcases/composite_unhappy_path.py:34:15: note:     z
+# tests/testcases/composite_unhappy_path.py:35:21: error: Only Protocols can be composed.  [valid-type]
+# Found 5 errors in 1 file (checked 1 source file)
@@ -0,0 +1,34 @@
+from typing import Protocol
+
+from typing_protocol_intersection import ProtocolIntersection
+
+
+class HasIntA(Protocol):
+    a: int
+
+
+class HasStrA(Protocol):
+    a: str
+
+
+class HasBytesA(HasStrA, Protocol):
+    a: bytes  # type: ignore[assignment]
+
+
+# When protocols define the same member, the one whose full name (with its own type arguments, like
+# "module.Proto[int]") comes first wins - whatever the order of type arguments of the intersection.
+def int_first(obj: ProtocolIntersection[HasIntA, HasStrA]) -> int:
+    return obj.a
+
+
+def str_first(obj: ProtocolIntersection[HasStrA, HasIntA]) -> int:
+    return obj.a
+
+
+# A protocol overriding a member wins over its base.
+def subprotocol_after_its_base(obj: ProtocolIntersection[HasStrA, HasBytesA]) -> bytes:
+    return obj.a
+
+
+# expected stdout
+# Success: no issues found in 1 source file
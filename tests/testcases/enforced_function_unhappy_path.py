@@ -0,0 +1,42 @@
+from typing import Protocol, runtime_checkable
+
+from typing_protocol_intersection import ProtocolIntersection, enforce_intersections
+
+
+@runtime_checkable
+class HasX(Protocol):
+    x: str
+
+
+@runtime_checkable
+class HasY(Protocol):
+    y: str
+
+
+class OnlyX:
+    x = "x"
+
+
+@enforce_intersections
+def get_x_y(obj: ProtocolIntersection[HasX, HasY]) -> ProtocolIntersection[HasX, HasY]:
+    return obj
+
+
+@enforce_intersections(sample=100)
+def get_x_y_sampled(obj: ProtocolIntersection[HasX, HasY]) -> ProtocolIntersection[HasX, HasY]:
+    return obj
+
+
+def main() -> None:
+    get_x_y(OnlyX())
+    get_x_y_sampled(OnlyX())
+
+
+# expected stdout
+# tests/testcases/enforced_function_unhappy_path.py:31:13: error: Argument 1 to "get_x_y" has incompatible type "OnlyX"; expected "ProtocolIntersection[HasX, HasY]"  [arg-type]
+# tests/testcases/enforced_function_unhappy_path.py:31:13: note: "OnlyX" is missing following "ProtocolIntersection" protocol member:
+# tests/testcases/enforced_function_unhappy_path.py:31:13: note:     y
+# tests/testcases/enforced_function_unhappy_path.py:32:21: error: Argument 1 to "get_x_y_sampled" has incompatible type "OnlyX"; expected "ProtocolIntersection[HasX, HasY]"  [arg-type]
+# tests/testcases/enforced_function_unhappy_path.py:32:21: note: "OnlyX" is missing following "ProtocolIntersection" protocol member:
+# tests/testcases/enforced_function_unhappy_path.py:32:21: note:     y
+# Found 2 errors in 1 file (checked 1 source file)
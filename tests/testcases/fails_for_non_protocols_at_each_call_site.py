@@ -0,0 +1,26 @@
+from typing import Generic, TypeVar
+
+from typing_protocol_intersection import ProtocolIntersection
+
+
+class NotProtocol:
+    pass
+
+
+_T = TypeVar("_T")
+
+
+class Noop(Generic[_T]):
+    @classmethod
+    def noop(cls, value: _T) -> ProtocolIntersection[_T]:
+        return value  # type: ignore
+
+
+first = Noop[NotProtocol].noop(NotProtocol())
+second = Noop[NotProtocol].noop(NotProtocol())
+
+
+# expected stdout
+# tests/testcases/fails_for_non_protocols_at_each_call_site.py:19:14: error: Only Protocols can be used in ProtocolIntersection.  [valid-type]
+# tests/testcases/fails_for_non_protocols_at_each_call_site.py:20:15: error: Only Protocols can be used in ProtocolIntersection.  [valid-type]
+# Found 2 errors in 1 file (checked 1 source file)
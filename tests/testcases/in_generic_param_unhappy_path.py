@@ -54,7 +54,7 @@ def main() -> None:
 # tests/testcases/in_generic_param_unhappy_path.py:49:15: error: Argument 1 to "get_x_y_1" has incompatible type "ProtocolIntersection[HasX]"; expected "DesiredObject"  [arg-type]
 # tests/testcases/in_generic_param_unhappy_path.py:49:15: note: "ProtocolIntersection" is missing following "DesiredObject" protocol member:
 # tests/testcases/in_generic_param_unhappy_path.py:49:15: note:     y
-# tests/testcases/in_generic_param_unhappy_path.py:50:15: error: Argument 1 to "get_x_y_2" has incompatible type "typing_protocol_intersection.types.ProtocolIntersection[HasX]"; expected "typing_protocol_intersection.types.ProtocolIntersection[HasY, HasX]"  [arg-type]
+# tests/testcases/in_generic_param_unhappy_path.py:50:15: error: Argument 1 to "get_x_y_2" has incompatible type "ProtocolIntersection[HasX]"; expected "ProtocolIntersection[HasX, HasY]"  [arg-type]
 # tests/testcases/in_generic_param_unhappy_path.py:50:15: note: "ProtocolIntersection" is missing following "ProtocolIntersection" protocol member:
 # tests/testcases/in_generic_param_unhappy_path.py:50:15: note:     y
 # Found 2 errors in 1 file (checked 1 source file)
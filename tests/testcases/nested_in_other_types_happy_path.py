@@ -0,0 +1,63 @@
+from collections.abc import Callable
+from typing import Generic, Protocol, TypeVar
+
+from typing_protocol_intersection import ProtocolIntersection
+
+
+class HasX(Protocol):
+    x: str
+
+
+class HasY(Protocol):
+    y: str
+
+
+_T = TypeVar("_T")
+
+
+class Builder(Generic[_T]):
+    def with_x(self) -> "Builder[ProtocolIntersection[_T, HasX]]":
+        return self  # type: ignore
+
+    def with_y_optionally(self) -> "Builder[ProtocolIntersection[_T, HasY]] | None":
+        return self  # type: ignore
+
+    def with_y_or_error(self) -> "Builder[ProtocolIntersection[_T, HasY]] | ValueError":
+        return self  # type: ignore
+
+    def with_y_later(self) -> "Callable[[], Builder[ProtocolIntersection[_T, HasY]]]":
+        return lambda: self  # type: ignore
+
+    def with_y_and_count(self) -> "tuple[Builder[ProtocolIntersection[_T, HasY]], int]":
+        return self, 2  # type: ignore
+
+    def with_y_in_list(self) -> "list[list[Builder[ProtocolIntersection[_T, HasY]]]]":
+        return [[self]]  # type: ignore
+
+    def build(self) -> _T:
+        return self  # type: ignore
+
+
+def get_x_y(obj: ProtocolIntersection[HasX, HasY]) -> str:
+    return obj.x + obj.y
+
+
+def main() -> None:
+    optional_builder = Builder().with_x().with_y_optionally()
+    assert optional_builder is not None
+    get_x_y(optional_builder.build())
+
+    builder_or_error = Builder().with_x().with_y_or_error()
+    assert not isinstance(builder_or_error, ValueError)
+    get_x_y(builder_or_error.build())
+
+    get_x_y(Builder().with_x().with_y_later()().build())
+
+    builder, _ = Builder().with_x().with_y_and_count()
+    get_x_y(builder.build())
+
+    get_x_y(Builder().with_x().with_y_in_list()[0][0].build())
+
+
+# expected stdout
+# Success: no issues found in 1 source file
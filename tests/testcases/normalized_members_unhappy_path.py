@@ -0,0 +1,53 @@
+from typing import Generic, Protocol, TypeVar
+
+from typing_protocol_intersection import ProtocolIntersection
+
+
+class HasBase(Protocol):
+    base: str
+
+
+class HasX(HasBase, Protocol):
+    x: str
+
+
+class HasY(Protocol):
+    y: str
+
+
+_T = TypeVar("_T")
+
+
+class Builder(Generic[_T]):
+    def with_base(self) -> "Builder[ProtocolIntersection[_T, HasBase]]":
+        return self  # type: ignore
+
+    def with_x(self) -> "Builder[ProtocolIntersection[_T, HasX]]":
+        return self  # type: ignore
+
+    def with_y(self) -> "Builder[ProtocolIntersection[_T, HasY]]":
+        return self  # type: ignore
+
+    def build(self) -> _T:
+        return self  # type: ignore
+
+
+def takes_int(value: int) -> None:
+    print(value)
+
+
+def written_redundantly(
+    obj: ProtocolIntersection[ProtocolIntersection[HasY, HasX], HasX, HasBase],
+) -> ProtocolIntersection[HasX, HasY]:
+    takes_int(obj)
+    return obj
+
+
+def main() -> None:
+    takes_int(Builder().with_y().with_base().with_x().with_y().build())
+
+
+# expected stdout
+# tests/testcases/normalized_members_unhappy_path.py:42:15: error: Argument 1 to "takes_int" has incompatible type "ProtocolIntersection[HasX, HasY]"; expected "int"  [arg-type]
+# tests/testcases/normalized_members_unhappy_path.py:47:15: error: Argument 1 to "takes_int" has incompatible type "ProtocolIntersection[HasX, HasY]"; expected "int"  [arg-type]
+# Found 2 errors in 1 file (checked 1 source file)
@@ -1,3 +1,3 @@
-from .types import ProtocolIntersection
+from .types import ProtocolIntersection, composite, enforce_intersections, iter_conforming
 
-__all__ = ["ProtocolIntersection"]
+__all__ = ["ProtocolIntersection", "composite", "enforce_intersections", "iter_conforming"]
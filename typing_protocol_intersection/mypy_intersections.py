@@ -0,0 +1,559 @@
+import bisect
+import hashlib
+import operator
+import threading
+from collections.abc import Iterable
+from typing import TypeGuard
+
+import mypy.nodes
+import mypy.types
+
+from typing_protocol_intersection.mypy_profiling import PluginProfile, profiled
+
+PROTOCOL_INTERSECTION_FULLNAME = "typing_protocol_intersection.types.ProtocolIntersection"
+
+
+class UniqueFullname(str):
+    """A string that has a suffix consisting of invisible characters.
+
+    The suffix is a stable hash of what the fullname is given for (for
+    ProtocolIntersections - of their member protocols), written with
+    INVISIBLE_DIGITS. This is a hack to get class fullnames that are
+    different for every different ProtocolIntersection. We need this so
+    that ProtocolIntersections are treated as separate classes, and not
+    as instances of the same class. Since the suffix only depends on the
+    content, it's the same in every mypy run, which keeps mypy's cache
+    valid.
+
+    We could just override __eq__, and in fact that's what's been here
+    before, but mypyc has an  optimization that treats all str
+    subclasses as strs when comparing. Distributions of mypy are
+    compiled with that optimization enabled, which used to break the
+    plugin.
+    """
+
+    INVISIBLE_DIGITS = (
+        "\u200b"  # zero width space
+        "\u200c"  # zero width non-joiner
+        "\u200d"  # zero width joiner
+        "\u2060"  # word joiner
+        "\u2061"  # function application
+        "\u2062"  # invisible times
+        "\u2063"  # invisible separator
+        "\u2064"  # invisible plus
+    )
+
+    def __new__(cls, base_fullname: str, content: Iterable[str]) -> "UniqueFullname":
+        digest = hashlib.blake2b("\0".join(sorted(content)).encode(), digest_size=8).digest()
+        # +1 so that the suffix is never empty and the fullname never clashes with the base one
+        return super().__new__(cls, base_fullname + cls._invisible_suffix(int.from_bytes(digest, "big") + 1))
+
+    @classmethod
+    def _invisible_suffix(cls, number: int) -> str:
+        # positional notation without leading zeros, so different numbers always give different suffixes
+        digits = []
+        while number:
+            number, digit = divmod(number, len(cls.INVISIBLE_DIGITS))
+            digits.append(cls.INVISIBLE_DIGITS[digit])
+        return "".join(reversed(digits))
+
+
+INTERSECTION_METADATA_KEY = "typing_protocol_intersection"
+
+# Synthesized intersections have no body, and their base class expressions are never analyzed, so all of their class
+# definitions share these. None of them is ever modified.
+_EMPTY_CLASS_BODY = mypy.nodes.Block([])
+_BASE_TYPE_EXPRS: list[mypy.nodes.Expression] = [
+    mypy.nodes.NameExpr("typing.Protocol"),
+    # mypy expects object to be here at the last index ('we skip "object" since everyone implements it')
+    mypy.nodes.NameExpr("builtins.object"),
+]
+
+
+def mk_protocol_intersection_typeinfo(
+    name: str,
+    *,
+    module: mypy.nodes.MypyFile,
+    # For ProtocolIntersections to not be treated as the same type, but just as protocols, their fullnames need to
+    # differ - that's why the fullname is a UniqueFullname derived from the content.
+    content: Iterable[str],
+) -> mypy.nodes.TypeInfo:
+    fullname = UniqueFullname(f"{module.fullname}.{name}", content)
+    # The name (not only the fullname) is unique, so that mypy doesn't print fullnames to tell intersections apart.
+    unique_name = fullname[len(module.fullname) + 1 :]
+    defn = mypy.nodes.ClassDef(name=unique_name, defs=_EMPTY_CLASS_BODY, base_type_exprs=_BASE_TYPE_EXPRS)
+    defn.fullname = fullname
+    type_info = mypy.nodes.TypeInfo(
+        names=mypy.nodes.SymbolTable(),
+        defn=defn,
+        module_name=module.fullname,
+    )
+    defn.info = type_info
+    type_info.mro = [type_info]
+    type_info.is_protocol = True
+    type_info.metadata[INTERSECTION_METADATA_KEY] = {}
+    _register_in_module(module, type_info)
+    return type_info
+
+
+def _register_in_module(module: mypy.nodes.MypyFile, type_info: mypy.nodes.TypeInfo) -> None:
+    # Just like mypy does with its own ad-hoc intersections, the TypeInfo is added to the current module's symbol table.
+    # This way it's written to the incremental cache along with the module and can be found when loading it back.
+    # Mind that mypy only serializes the node itself (and not a cross reference to it) if the node's fullname is exactly
+    # f"{module.fullname}.{type_info.name}" - that's why intersections are named after the module they're created in.
+    #
+    # dmypy clears module symbol tables before analyzing modules again, so interned intersections need to be put back.
+    symbol = module.names.get(type_info.name)
+    if symbol is None or symbol.node is not type_info:
+        module.names[type_info.name] = mypy.nodes.SymbolTableNode(
+            mypy.nodes.GDEF, type_info, module_public=False, module_hidden=True, plugin_generated=True
+        )
+
+
+IntersectionMembers = frozenset[mypy.types.Instance]
+
+
+class _Interned:
+    __slots__ = ("type_info", "key", "_member_infos", "_member_names", "_member_mros", "_extension_state")
+
+    def __init__(
+        self,
+        type_info: mypy.nodes.TypeInfo,
+        members: IntersectionMembers,
+        extension_state: "_ExtensionState | None" = None,
+    ) -> None:
+        self.type_info = type_info
+        self.key = members
+        # dmypy doesn't replace the TypeInfos of edited classes, it merges the new definitions into them instead. Their
+        # names and mro are swapped for new objects then, which is what tells us whether the interned value is stale.
+        # These are checked every time an intersection is extended, so it's all done with builtins, without a loop of
+        # Python code going through the members.
+        self._member_infos = tuple(map(_TYPE, members))
+        self._member_names = tuple(map(_NAMES, self._member_infos))
+        self._member_mros = tuple(map(_MRO, self._member_infos))
+        self._extension_state = extension_state
+
+    def is_up_to_date(self) -> bool:
+        return all(map(operator.is_, map(_NAMES, self._member_infos), self._member_names)) and all(
+            map(operator.is_, map(_MRO, self._member_infos), self._member_mros)
+        )
+
+    def extension_state(self) -> "_ExtensionState | None":
+        # only built for intersections that get extended, and then handed down to the extended ones
+        if self._extension_state is None:
+            self._extension_state = _ExtensionState.of(self.type_info, self.key)
+        return self._extension_state
+
+
+_TYPE = operator.attrgetter("type")
+_NAMES = operator.attrgetter("names")
+_MRO = operator.attrgetter("mro")
+
+
+class _ExtensionState:
+    """What's needed to extend a folded intersection with more members without going through its members again.
+
+    The state of an extended intersection only holds what its added
+    members bring, along with the state of the intersection it extends.
+    The two are merged when it gets extended itself - which copies the
+    sets and the dict of the extended one, but doesn't go through its
+    members.
+    """
+
+    __slots__ = ("sort_keys", "members", "_member_infos", "_bases", "_name_owners", "_extended")
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        sort_keys: tuple[str, ...],
+        members: tuple[mypy.types.Instance, ...],
+        member_infos: frozenset[mypy.nodes.TypeInfo],
+        bases: frozenset[mypy.nodes.TypeInfo],
+        name_owners: dict[str, str],
+        *,
+        extended: "_ExtensionState | None" = None,
+    ) -> None:
+        # members, sorted (and so in the order of normalize_intersection_args), along with their sort keys
+        self.sort_keys = sort_keys
+        self.members = members
+        # while there's an extended state to merge, the rest only covers the added members
+        self._member_infos = member_infos
+        # everything in the intersection's MRO
+        self._bases = bases
+        # the sort key of the member that each name in the flattened member table comes from
+        self._name_owners = name_owners
+        self._extended = extended
+
+    @classmethod
+    def of(cls, type_info: mypy.nodes.TypeInfo, members: IntersectionMembers) -> "_ExtensionState | None":
+        if not all(member.type.is_protocol for member in members):
+            # these need to be reported wherever they're folded, so intersections containing them are never extended
+            return None
+        sort_keys, sorted_members = zip(
+            *sorted(((str(member), member) for member in members), key=operator.itemgetter(0)), strict=True
+        )
+        name_owners: dict[str, str] = {}
+        for sort_key, member in zip(sort_keys, sorted_members, strict=True):
+            for base in member.type.mro:
+                if base.is_protocol:
+                    for name in base.names:
+                        name_owners.setdefault(name, sort_key)
+        return cls(
+            sort_keys,
+            sorted_members,
+            frozenset(member.type for member in members),
+            frozenset(type_info.mro),
+            name_owners,
+        )
+
+    @property
+    def member_infos(self) -> frozenset[mypy.nodes.TypeInfo]:
+        self._merge()
+        return self._member_infos
+
+    @property
+    def bases(self) -> frozenset[mypy.nodes.TypeInfo]:
+        self._merge()
+        return self._bases
+
+    @property
+    def name_owners(self) -> dict[str, str]:
+        self._merge()
+        return self._name_owners
+
+    def _merge(self) -> None:
+        if self._extended is None:
+            return
+        extended, self._extended = self._extended, None
+        self._member_infos = extended.member_infos | self._member_infos
+        self._bases = extended.bases | self._bases
+        # the added members only own the names they've taken over, so they go second
+        self._name_owners = extended.name_owners | self._name_owners
+
+
+class IntersectionCache:
+    """Interning table of synthesized ProtocolIntersections.
+
+    Intersections with the same set of member protocols (type arguments
+    included) share a single TypeInfo within a module, so that they're
+    only built once - no matter if they're written in annotations or
+    folded from type arguments. This also lets mypy's subtype caches,
+    which are keyed by the TypeInfo of the supertype, get hits when a
+    class is checked against the same intersection again, and makes
+    checks between equal intersections nominal. Intersections aren't
+    shared between modules, as each one lives in the symbol table of
+    the module it's been created in.
+
+    Intersections folded from an already folded one and a couple of new
+    members (as every step of a builder chain does) are built by
+    extending the folded one, see extend().
+
+    The table lives as long as the plugin, which for dmypy is the whole
+    daemon session. It holds up to max_size intersections, dropping the
+    least recently used ones when it's full - their TypeInfos stay in
+    the symbol tables of their modules for as long as mypy keeps these,
+    and are taken from there if they're needed again. Intersections
+    built from outdated member protocols are rebuilt, and the ones of a
+    module are dropped when the module is parsed again.
+
+    The table can be used from several threads at once. Intersections
+    are built while holding its lock, so that every set of members still
+    gets a single TypeInfo per module, and modules' symbol tables are
+    only ever updated by one thread at a time.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        # dicts keep the order of insertion, and hits are moved to the end - so the least recently used come first
+        self._interned: dict[tuple[str, IntersectionMembers], _Interned] = {}
+        self._by_type_info: dict[mypy.nodes.TypeInfo, _Interned] = {}
+        self._max_size = max_size
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._interned)
+
+    def get(self, module: mypy.nodes.MypyFile, members: list[mypy.types.Instance]) -> mypy.nodes.TypeInfo:
+        """Returns the TypeInfo of the intersection of the given normalized members, building it if needed."""
+        key = frozenset(members)
+        with self._lock:
+            entry = self._lookup(module, key)
+            if entry is None:
+                type_info = _registered_intersection_typeinfo(module, members) or _mk_intersection_typeinfo(
+                    module, members
+                )
+                entry = self._intern(module, _Interned(type_info, key))
+            return entry.type_info
+
+    def extend(
+        self, module: mypy.nodes.MypyFile, intersection: mypy.types.Instance, *, max_width: int
+    ) -> tuple[mypy.nodes.TypeInfo, tuple[mypy.types.Instance, ...]] | None:
+        """Folds an intersection of an already folded intersection and other members.
+
+        The TypeInfo of the folded intersection is extended with the
+        other members, so that only their MROs are gone through. The
+        member table, the MRO and the sets of the folded intersection
+        are still copied, so it takes longer the more members there
+        are - just a lot less than folding from scratch does.
+
+        Returns the TypeInfo along with the normalized members, or None
+        if the intersection needs to be folded from scratch: if it's of
+        some other shape (the folded intersection's type arguments
+        included), if the new members and the folded ones imply one
+        another, if any of them isn't a protocol or if there'd be more
+        than max_width members.
+        """
+        nested = [arg for arg in intersection.args if is_intersection(arg)]
+        if len(nested) != 1:
+            return None
+        with self._lock:
+            return self._extend(module, intersection, nested[0], max_width=max_width)
+
+    def _extend(
+        self,
+        module: mypy.nodes.MypyFile,
+        intersection: mypy.types.Instance,
+        nested: mypy.types.Instance,
+        *,
+        max_width: int,
+    ) -> tuple[mypy.nodes.TypeInfo, tuple[mypy.types.Instance, ...]] | None:
+        base = self._by_type_info.get(nested.type)
+        if base is None or not base.is_up_to_date() or (state := base.extension_state()) is None:
+            return None
+        # the folded intersection may carry more members in its type arguments than it's been built of - like the
+        # ones substituted for type variables - and then it's the arguments that are to be folded. Most often they're
+        # the very members it's been built of, which is checked first, without hashing them.
+        if (
+            not (len(nested.args) == len(state.members) and all(map(operator.is_, nested.args, state.members)))
+            and set(nested.args) != base.key
+        ):
+            return None
+        # the added members are checked against the sets of the folded intersection and against their own ones, so
+        # that the sets of the folded intersection aren't copied
+        added: list[mypy.types.Instance] = []
+        added_infos: set[mypy.nodes.TypeInfo] = set()
+        added_bases: set[mypy.nodes.TypeInfo] = set()
+        for arg in intersection.args:
+            if arg is nested or not isinstance(arg, mypy.types.Instance) or arg in base.key or arg in added:
+                continue
+            implied = arg.type.mro[1:]
+            if (
+                not arg.type.is_protocol
+                or arg.type in state.bases
+                or arg.type in added_bases
+                or not state.member_infos.isdisjoint(implied)
+                or not added_infos.isdisjoint(implied)
+            ):
+                return None
+            added.append(arg)
+            added_infos.add(arg.type)
+            added_bases.update(arg.type.mro)
+        if len(state.members) + len(added) > max_width:
+            return None
+        key = base.key.union(added)
+        entry = self._lookup(module, key)
+        if entry is None:
+            entry = self._intern(module, _extend_intersection_typeinfo(module, base, state, added, key))
+        extension_state = entry.extension_state()
+        assert extension_state is not None
+        return entry.type_info, extension_state.members
+
+    def forget_module(self, module_fullname: str) -> None:
+        with self._lock:
+            for module_and_key in [
+                module_and_key for module_and_key in self._interned if module_and_key[0] == module_fullname
+            ]:
+                self._drop(module_and_key)
+
+    def _lookup(self, module: mypy.nodes.MypyFile, key: IntersectionMembers) -> _Interned | None:
+        module_and_key = (module.fullname, key)
+        entry = self._interned.pop(module_and_key, None)
+        if entry is None:
+            return None
+        if not entry.is_up_to_date():
+            self._by_type_info.pop(entry.type_info, None)
+            return None
+        self._interned[module_and_key] = entry
+        _register_in_module(module, entry.type_info)
+        return entry
+
+    def _intern(self, module: mypy.nodes.MypyFile, entry: _Interned) -> _Interned:
+        # only called after a missed _lookup, so the table has no entry for these members
+        while len(self._interned) >= self._max_size:
+            self._drop(next(iter(self._interned)))
+        self._interned[module.fullname, entry.key] = self._by_type_info[entry.type_info] = entry
+        return entry
+
+    def _drop(self, module_and_key: tuple[str, IntersectionMembers]) -> None:
+        entry = self._interned.pop(module_and_key)
+        self._by_type_info.pop(entry.type_info, None)
+
+
+def _registered_intersection_typeinfo(
+    module: mypy.nodes.MypyFile, members: Iterable[mypy.types.Instance], *, content: Iterable[str] | None = None
+) -> mypy.nodes.TypeInfo | None:
+    """Returns the TypeInfo of the intersection of the given members if the module's symbol table has an up-to-date one.
+
+    Intersections dropped from the cache stay in the symbol tables of
+    their modules, and the types analyzed before they were dropped keep
+    referring to them. Building another TypeInfo with the same fullname
+    would make mypy see two different classes where it expects one, so
+    the registered one is reused - unless it's been built of outdated
+    definitions of the members. The content of the fullname (the
+    members' sort keys) can be given if it's already known.
+    """
+    members = list(members)
+    if content is None:
+        content = (str(member) for member in members)
+    fullname = UniqueFullname(f"{module.fullname}.ProtocolIntersection", content)
+    symbol = module.names.get(fullname[len(module.fullname) + 1 :])
+    if symbol is None or not isinstance(symbol.node, mypy.nodes.TypeInfo):
+        return None
+    type_info = symbol.node
+    if INTERSECTION_METADATA_KEY not in type_info.metadata:
+        return None
+    # these are what get outdated when dmypy merges new definitions of the members into their TypeInfos (see _Interned)
+    if set(type_info.mro[1:]) != {base for member in members for base in member.type.mro}:
+        return None
+    if type_info.names != _flattened_member_table(members):
+        return None
+    return type_info
+
+
+def _mk_intersection_typeinfo(module: mypy.nodes.MypyFile, members: list[mypy.types.Instance]) -> mypy.nodes.TypeInfo:
+    if (profile := PluginProfile.active) is not None:
+        profile.record_intersection_created()
+    type_info = mk_protocol_intersection_typeinfo(
+        "ProtocolIntersection", module=module, content=(str(member) for member in members)
+    )
+    # add base classes to MRO - this way we can support protocols inheriting one another
+    merge_intersection_members(members, type_info)
+    return type_info
+
+
+def _extend_intersection_typeinfo(  # pylint: disable=too-many-locals
+    module: mypy.nodes.MypyFile,
+    base: _Interned,
+    state: _ExtensionState,
+    added: list[mypy.types.Instance],
+    key: IntersectionMembers,
+) -> _Interned:
+    """Builds the intersection of the given one and the added members, which neither imply nor are implied by these.
+
+    The result is the same as of merge_intersection_members, except for
+    the order of the MRO (which mypy only walks for names missing in the
+    flattened member table, and there aren't any): the bases of added
+    members come before the ones of the intersection, no matter how the
+    members are sorted. Nothing that's only in the state of the given
+    intersection is gone through, see _ExtensionState.
+    """
+    sort_keys, members = list(state.sort_keys), list(state.members)
+    added_sort_keys = [str(member) for member in added]
+    for member, sort_key in zip(added, added_sort_keys, strict=True):
+        position = bisect.bisect(sort_keys, sort_key)
+        sort_keys.insert(position, sort_key)
+        members.insert(position, member)
+    registered = _registered_intersection_typeinfo(module, key, content=sort_keys)
+    if registered is not None:
+        return _Interned(registered, key)
+    if (profile := PluginProfile.active) is not None:
+        profile.record_intersection_created()
+    seen: set[mypy.nodes.TypeInfo] = set()
+    mro_chunks = []
+    for member in added:
+        mro_chunk = [info for info in member.type.mro if info not in state.bases and info not in seen]
+        seen.update(mro_chunk)
+        mro_chunks.append(mro_chunk)
+    type_info = mk_protocol_intersection_typeinfo("ProtocolIntersection", module=module, content=sort_keys)
+    type_info.mro = [
+        type_info,
+        *(info for mro_chunk in reversed(mro_chunks) for info in mro_chunk),
+        *base.type_info.mro[1:],
+    ]
+    type_info.names.update(base.type_info.names)
+    claimed_names: dict[str, str] = {}
+    for member, sort_key in zip(added, added_sort_keys, strict=True):
+        _claim_member_names(type_info.names, member, sort_key, state.name_owners, claimed_names)
+    extension_state = _ExtensionState(
+        tuple(sort_keys),
+        tuple(members),
+        frozenset(member.type for member in added),
+        frozenset(seen),
+        claimed_names,
+        extended=state,
+    )
+    return _Interned(type_info, key, extension_state)
+
+
+def _claim_member_names(
+    names: mypy.nodes.SymbolTable,
+    member: mypy.types.Instance,
+    sort_key: str,
+    name_owners: dict[str, str],
+    claimed_names: dict[str, str],
+) -> None:
+    # the same precedence as in _flatten_member_table - the member that comes first in the order of sort keys wins
+    claimed = set()
+    for info in member.type.mro:
+        if info.is_protocol:
+            for name, symbol in info.names.items():
+                if name in claimed:
+                    continue
+                claimed.add(name)
+                owner = claimed_names.get(name, name_owners.get(name))
+                if owner is None or sort_key < owner:
+                    names[name] = symbol
+                    claimed_names[name] = sort_key
+
+
+@profiled
+def merge_intersection_members(
+    members: list[mypy.types.Instance], type_info: mypy.nodes.TypeInfo
+) -> mypy.nodes.TypeInfo:
+    # We might be interested in modifying another properties too (like type_info.defn.base_type_exprs), but up until
+    # now it seems what we have is enough. Keep number of modified properties as low as possible (so that it's
+    # manageable).
+    #
+    # We also don't check for is_protocol in the bae classes - mypy doesn't allow protocol to have non-protocol base
+    # classes anyway and for direct ProtocolIntersection type arguments we do the check in type_analyze_hook.
+    #
+    # Every member puts its bases that aren't in the MRO yet in front of the ones of the members before it, so the
+    # last member's bases come first. The chunks are collected in the order of members and only joined (reversed) at
+    # the end, with a set for the membership tests - this keeps folding linear in the total size of the members'
+    # MROs. The intersection itself stays first, like every class does in its MRO.
+    seen = set(type_info.mro)
+    mro_chunks = []
+    for member in members:
+        mro_chunk = [base for base in member.type.mro if base not in seen]
+        seen.update(mro_chunk)
+        mro_chunks.append(mro_chunk)
+    type_info.mro = type_info.mro + [base for mro_chunk in reversed(mro_chunks) for base in mro_chunk]
+    _flatten_member_table(type_info, members)
+    return type_info
+
+
+def _flatten_member_table(type_info: mypy.nodes.TypeInfo, members: list[mypy.types.Instance]) -> None:
+    # mypy looks members up by walking the MRO until one of the classes has the name. Copying the members of all the
+    # protocols into the intersection's own names (it's first in the MRO) turns these walks into a single dict lookup.
+    #
+    # When protocols define the same member, the one that comes first wins. Intersections are interned regardless of
+    # the order of their members, so members are taken in the order of their string forms - their full names along
+    # with their type arguments, like "module.Proto[int]", so a.Zeta comes before b.Alpha - and then in the order of
+    # their MROs (so that a protocol overriding a member of its base wins over the base).
+    for name, symbol in _flattened_member_table(members).items():
+        type_info.names.setdefault(name, symbol)
+
+
+def _flattened_member_table(members: Iterable[mypy.types.Instance]) -> dict[str, mypy.nodes.SymbolTableNode]:
+    names: dict[str, mypy.nodes.SymbolTableNode] = {}
+    for member in sorted(members, key=str):
+        for base in member.type.mro:
+            if base.is_protocol:
+                for name, symbol in base.names.items():
+                    names.setdefault(name, symbol)
+    return names
+
+
+def is_intersection(typ: mypy.types.Type) -> TypeGuard[mypy.types.Instance]:
+    return isinstance(typ, mypy.types.Instance) and (
+        INTERSECTION_METADATA_KEY in typ.type.metadata or typ.type.fullname == PROTOCOL_INTERSECTION_FULLNAME
+    )
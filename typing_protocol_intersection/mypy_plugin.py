@@ -1,200 +1,610 @@
-import collections
+import configparser
+import functools
+import os
+import sys
 import typing
 from collections import deque
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
 from itertools import takewhile
-from typing import TypeGuard
 
+import mypy.checker
 import mypy.errorcodes
+import mypy.maptype
 import mypy.nodes
+import mypy.options
 import mypy.plugin
+import mypy.semanal
+import mypy.typeanal
 import mypy.types
 
+from typing_protocol_intersection.mypy_intersections import (
+    PROTOCOL_INTERSECTION_FULLNAME,
+    IntersectionCache,
+    is_intersection,
+)
+from typing_protocol_intersection.mypy_profiling import (
+    PLUGIN_VERSION,
+    PROFILE_ENV_VAR,
+    PluginProfile,
+    enable_profiling,
+    profiled,
+)
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
 SignatureContext = mypy.plugin.FunctionSigContext | mypy.plugin.MethodSigContext
-AnyContext = SignatureContext | mypy.plugin.AnalyzeTypeContext
+CallContext = SignatureContext | mypy.plugin.FunctionContext
+AnyContext = CallContext | mypy.plugin.AnalyzeTypeContext
+
+COMPOSITE_FULLNAME = "typing_protocol_intersection.types.composite"
+
+CONFIG_SECTION = "typing_protocol_intersection"
+
+
+def _parse_bool(value: object) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in configparser.ConfigParser.BOOLEAN_STATES:
+        return configparser.ConfigParser.BOOLEAN_STATES[value.lower()]
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def _parse_positive_int(value: object) -> int:
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+        return value
+    raise ValueError(f"not a positive integer: {value!r}")
+
+
+def _parse_str(value: object) -> str:
+    if isinstance(value, str):
+        return value
+    raise ValueError(f"not a string: {value!r}")
+
+
+# how the values of PluginSettings are read from config files
+_SETTING_PARSERS: dict[str, Callable[[object], object]] = {
+    "profile": _parse_str,
+    "normalize": _parse_bool,
+    "max_width": _parse_positive_int,
+    "max_depth": _parse_positive_int,
+    "cache_size": _parse_positive_int,
+}
+# settings that don't affect the results of type checking, and so shouldn't invalidate mypy's cache when changed
+_NON_SEMANTIC_SETTINGS = frozenset({"profile", "cache_size"})
+
+
+class PluginSettings(typing.NamedTuple):
+    """Settings of the plugin.
+
+    They're read from the [typing_protocol_intersection] section of
+    mypy's config file, or from [tool.typing_protocol_intersection] if
+    it's a pyproject.toml.
+    """
+
+    # where to write the profiling report (see PluginProfile) - PROFILE_ENV_VAR takes precedence
+    profile: str | None = None
+    # whether intersection members are normalized (see normalize_intersection_args) or taken as written
+    normalize: bool = True
+    # Intersections with more members, or nested in one another deeper than that, are reported as errors and not built.
+    # This keeps pathological (e.g. generated) code from taking unbounded time.
+    max_width: int = 128
+    max_depth: int = 32
+    # how many synthesized intersections the plugin keeps for reuse, see IntersectionCache
+    cache_size: int = 4096
+
+    @classmethod
+    def from_config_file(cls, config_file: str | None) -> "PluginSettings":
+        if config_file is None:
+            return cls()
+        if config_file.endswith(".toml"):
+            with open(config_file, "rb") as toml_file:
+                section: dict[str, object] = tomllib.load(toml_file).get("tool", {}).get(CONFIG_SECTION, {})
+        else:
+            parser = configparser.ConfigParser()
+            parser.read(config_file, encoding="utf-8")
+            section = dict(parser[CONFIG_SECTION]) if parser.has_section(CONFIG_SECTION) else {}
+        settings = {}
+        for name, value in section.items():
+            if name not in _SETTING_PARSERS:
+                raise ValueError(f"Unknown setting {name!r} in the {CONFIG_SECTION} section of {config_file}")
+            try:
+                settings[name] = _SETTING_PARSERS[name](value)
+            except ValueError as error:
+                raise ValueError(
+                    f"Invalid {name!r} in the {CONFIG_SECTION} section of {config_file}: {error}"
+                ) from None
+        return cls(**settings)  # type: ignore[arg-type]
+
+    def config_data(self) -> dict[str, object]:
+        return {
+            name: value
+            for name, value in zip(PluginSettings._fields, self, strict=True)
+            if name not in _NON_SEMANTIC_SETTINGS
+        }
 
 
 class ProtocolIntersectionPlugin(mypy.plugin.Plugin):
     # pylint: disable=unused-argument
 
-    def report_config_data(self, ctx: mypy.plugin.ReportConfigContext) -> int:
+    _PROFILED_METHODS = (
+        "report_config_data",
+        "get_additional_deps",
+        "get_type_analyze_hook",
+        "get_method_signature_hook",
+        "get_function_signature_hook",
+        "get_function_hook",
+    )
+
+    def __init__(self, options: mypy.options.Options) -> None:
+        super().__init__(options)
+        self._settings = PluginSettings.from_config_file(options.config_file)
+        if report_path := os.environ.get(PROFILE_ENV_VAR) or self._settings.profile:
+            enable_profiling(report_path)
+            # mypy leaves with os._exit() by default, which wouldn't let the report be written
+            options.fast_exit = False
+            # mypy asks for hooks all the time, so these are only wrapped when they're profiled
+            for method_name in self._PROFILED_METHODS:
+                setattr(self, method_name, profiled(getattr(self, method_name)))
+        # Callable fullname -> whether its declared signature may contain a ProtocolIntersection. Populated lazily,
+        # on the first call site of each callable, so that the signature hooks are only run where they matter. Threads
+        # racing to index the same callable come to the same verdict, so single (atomic) dict operations are enough.
+        self._signature_index: dict[str, bool] = {}
+        self._intersections = IntersectionCache(self._settings.cache_size)
+        self._signature_hook = functools.partial(
+            intersection_function_signature_hook, intersections=self._intersections, settings=self._settings
+        )
+        self._composite_hook = functools.partial(
+            composite_hook,
+            intersections=self._intersections,
+            settings=self._settings,
+            lookup_fully_qualified=self.lookup_fully_qualified,
+        )
+
+    def report_config_data(self, ctx: mypy.plugin.ReportConfigContext) -> dict[str, object]:
         # Whatever this method returns is used by mypy to determine whether a module should be checked again or if a
         # cache-loaded info will do. If the obtained value is different from the previous one, cache is invalidated.
         #
-        # As far as this plugin is concerned, this method is only used to aid generation of `UniqueFullname`s. If it
-        # wasn't for this method, mypy couldn't identify where a runtime-generated class name comes from, as it looks up
-        # the class names in the cache (and subsequently crashes when it fails to find them).
-        return UniqueFullname.instance_counter
+        # Synthesized intersections have content-derived fullnames and are stored in the cache along with the modules
+        # they're created in, so the cache only needs to be invalidated when the plugin itself or its settings change.
+        return {"version": PLUGIN_VERSION, "settings": self._settings.config_data()}
+
+    def get_additional_deps(self, file: mypy.nodes.MypyFile) -> list[tuple[int, str, int]]:
+        # Called whenever a module is parsed, which in a dmypy session also happens every time the module is edited.
+        # Whatever's been derived from its previous version is not to be trusted anymore.
+        self._intersections.forget_module(file.fullname)
+        # Callables are indexed under the names they're called by, which aren't necessarily in the module defining them,
+        # so the whole index goes. It's rebuilt lazily and cheaply anyway.
+        self._signature_index.clear()
+        return []
 
     def get_type_analyze_hook(
         self, fullname: str
     ) -> Callable[[mypy.plugin.AnalyzeTypeContext], mypy.types.Type] | None:
-        if fullname == "typing_protocol_intersection.types.ProtocolIntersection":
-            return type_analyze_hook(fullname)
+        if fullname == PROTOCOL_INTERSECTION_FULLNAME:
+            return type_analyze_hook(intersections=self._intersections, settings=self._settings)
         return None
 
     def get_method_signature_hook(
         self, fullname: str
     ) -> Callable[[mypy.plugin.MethodSigContext], mypy.types.FunctionLike] | None:
-        return intersection_function_signature_hook
+        if self._signature_may_contain_intersection(fullname):
+            return self._signature_hook
+        return None
 
     def get_function_signature_hook(
         self, fullname: str
     ) -> Callable[[mypy.plugin.FunctionSigContext], mypy.types.FunctionLike] | None:
-        return intersection_function_signature_hook
-
-
-class TypeInfoWrapper(typing.NamedTuple):
-    type_info: mypy.nodes.TypeInfo
-    # base_classes need to only contain the direct base classes - they are used when pretty-printing the name of a
-    # concrete ProtocolIntersection
-    base_classes: list[mypy.nodes.TypeInfo]
-
-
-class UniqueFullname(str):
-    """A string that has a suffix consisting of zero-width spaces.
-
-    Each instance created has more ZWSPs appended than the previously
-    created one. This is a hack to get class fullnames that are all
-    different from each other. We need this so that all
-    ProtocolIntersections are treated as separate classes, and not as
-    instances of the same class.
-
-    We could just override __eq__, and in fact that's what's been here
-    before, but mypyc has an  optimization that treats all str
-    subclasses as strs when comparing. Distributions of mypy are
-    compiled with that optimization enabled, which used to break the
-    plugin.
-    """
-
-    ZERO_WIDTH_SPACE = "\u200b"
-    instance_counter: typing.ClassVar[int] = 0
-
-    def __new__(cls, base_fullname: str) -> "UniqueFullname":
-        cls.instance_counter += 1
-
-        # This is a very naive implementation. We could encode the suffix with more invisible characters, but for
-        # simplicity let's keep it as is, unless it turns out that the performance suffers a lot.
-        invisible_suffix = cls.instance_counter * cls.ZERO_WIDTH_SPACE
-        return super().__new__(cls, base_fullname + invisible_suffix)
+        if self._signature_may_contain_intersection(fullname):
+            return self._signature_hook
+        return None
 
+    def get_function_hook(self, fullname: str) -> Callable[[mypy.plugin.FunctionContext], mypy.types.Type] | None:
+        if fullname == COMPOSITE_FULLNAME:
+            return self._composite_hook
+        return None
 
-def mk_protocol_intersection_typeinfo(
-    name: str,
-    *,
-    # For ProtocolIntersections to not be treated as the same type, but just as protocols,
-    # their fullnames need to differ - that's why it's a UniqueFullname.
-    fullname: UniqueFullname,
-    symbol_table: mypy.nodes.SymbolTable | None = None,
-) -> mypy.nodes.TypeInfo:
-    defn = mypy.nodes.ClassDef(
-        name=name,
-        defs=mypy.nodes.Block([]),
-        base_type_exprs=[
-            mypy.nodes.NameExpr("typing.Protocol"),
-            # mypy expects object to be here at the last index ('we skip "object" since everyone implements it')
-            mypy.nodes.NameExpr("builtins.object"),
-        ],
-        type_vars=[],
-    )
-    defn.fullname = fullname
-    defn.info.is_protocol = True
-    type_info = mypy.nodes.TypeInfo(
-        names=symbol_table if symbol_table is not None else mypy.nodes.SymbolTable(),
-        defn=defn,
-        module_name="typing_protocol_intersection",
-    )
-    type_info.mro = [type_info]
-    type_info.is_protocol = True
-    return type_info
+    def _signature_may_contain_intersection(self, fullname: str) -> bool:
+        try:
+            return self._signature_index[fullname]
+        except KeyError:
+            pass
+        declared_types = self._declared_signature_types(fullname)
+        # If we can't tell what the signature looks like, we'd better run the hook - it's a no-op for callables without
+        # intersections anyway, just a slower one.
+        contains_intersection = _IntersectionDetector()
+        verdict = declared_types is None or any(contains_intersection(t) for t in declared_types)
+        self._signature_index[fullname] = verdict
+        return verdict
+
+    def _declared_signature_types(self, fullname: str) -> list[mypy.types.Type] | None:
+        symbol = self.lookup_fully_qualified(fullname)
+        if symbol is None:
+            # Methods are reported under the name of the type they're called on, which is not necessarily the type that
+            # defines them.
+            owner_fullname, _, member_name = fullname.rpartition(".")
+            owner = self.lookup_fully_qualified(owner_fullname) if owner_fullname else None
+            if owner is None or not isinstance(owner.node, mypy.nodes.TypeInfo):
+                return None
+            symbol = owner.node.get(member_name)
+            if symbol is None:
+                return None
+        if isinstance(symbol.node, mypy.nodes.TypeInfo):
+            # a constructor call
+            constructors = (symbol.node.get(name) for name in ("__init__", "__new__"))
+            nodes = [constructor.node for constructor in constructors if constructor is not None]
+        else:
+            nodes = [symbol.node]
+        declared_types: list[mypy.types.Type] = []
+        for node in nodes:
+            if isinstance(node, mypy.nodes.FuncDef | mypy.nodes.OverloadedFuncDef):
+                if node.type is not None:
+                    declared_types.append(node.type)
+            elif isinstance(node, mypy.nodes.Decorator | mypy.nodes.Var) and node.type is not None:
+                declared_types.append(node.type)
+            else:
+                return None
+        return declared_types
 
 
 class ProtocolIntersectionResolver:
-    def __init__(self, context: SignatureContext) -> None:
+    def __init__(self, context: CallContext, intersections: IntersectionCache, settings: PluginSettings) -> None:
         super().__init__()
         self._context = context
-
-    def fold_intersection_and_its_args(self, type_: mypy.types.Type) -> mypy.types.Type:
-        folded_type = self.fold_intersection(type_)
-        if isinstance(folded_type, mypy.types.Instance):
-            folded_type.args = tuple(self.fold_intersection(t) for t in folded_type.args)
-        return folded_type
-
+        self._intersections = intersections
+        self._settings = settings
+        self._contains_intersection = _IntersectionDetector()
+        self._folded_aliases: set[mypy.types.TypeAliasType] = set()
+
+    def fold_intersections(self, type_: mypy.types.Type) -> mypy.types.Type:
+        """Folds the intersections nested in the type at any depth.
+
+        Parts of the type without intersections are neither visited nor
+        copied, so a type without any is returned as it is.
+        """
+        if not self._contains_intersection(type_):
+            return type_
+        if is_intersection(type_):
+            return self.fold_intersection(type_)
+        if isinstance(type_, mypy.types.TypeAliasType):
+            if type_ in self._folded_aliases:
+                # a recursive alias - its intersections are folded where it's expanded for the first time
+                return type_
+            self._folded_aliases.add(type_)
+            try:
+                return self.fold_intersections(mypy.types.get_proper_type(type_))
+            finally:
+                self._folded_aliases.discard(type_)
+        return self._fold_components(type_)
+
+    def _fold_components(self, typ: mypy.types.Type) -> mypy.types.Type:  # pylint: disable=too-many-return-statements
+        # mirrors _component_types - every kind of type is only copied if any of its components has changed
+        if isinstance(typ, mypy.types.Instance):
+            args = self._fold_all(typ.args)
+            return typ if args is None else typ.copy_modified(args=args)
+        if isinstance(typ, mypy.types.CallableType):
+            arg_types = self._fold_all(typ.arg_types)
+            ret_type = self.fold_intersections(typ.ret_type)
+            if arg_types is None and ret_type is typ.ret_type:
+                return typ
+            return typ.copy_modified(arg_types=typ.arg_types if arg_types is None else arg_types, ret_type=ret_type)
+        if isinstance(typ, mypy.types.Overloaded):
+            items = self._fold_all(typ.items)
+            return typ if items is None else mypy.types.Overloaded(typing.cast(list[mypy.types.CallableType], items))
+        if isinstance(typ, mypy.types.TupleType):
+            items = self._fold_all(typ.items)
+            return typ if items is None else typ.copy_modified(items=items)
+        if isinstance(typ, mypy.types.UnionType):
+            items = self._fold_all(typ.items)
+            return typ if items is None else mypy.types.UnionType(items, typ.line, typ.column)
+        if isinstance(typ, mypy.types.TypedDictType):
+            items = self._fold_all(list(typ.items.values()))
+            return typ if items is None else typ.copy_modified(item_types=items)
+        if isinstance(typ, mypy.types.TypeType):
+            item = self.fold_intersections(typ.item)
+            return (
+                typ if item is typ.item else mypy.types.TypeType.make_normalized(item, line=typ.line, column=typ.column)
+            )
+        return typ
+
+    def _fold_all(self, types: typing.Sequence[mypy.types.Type]) -> list[mypy.types.Type] | None:
+        """Returns the folded types, or None if none of them has changed."""
+        folded = [self.fold_intersections(t) for t in types]
+        if all(f is t for f, t in zip(folded, types, strict=True)):
+            return None
+        return folded
+
+    @profiled
     def fold_intersection(self, type_: mypy.types.Type) -> mypy.types.Type:
-        if not self._is_intersection(type_):
+        if not is_intersection(type_):
             return type_
-        type_info = mk_protocol_intersection_typeinfo(
-            "ProtocolIntersection",
-            fullname=UniqueFullname("typing_protocol_intersection.types.ProtocolIntersection"),
-        )
-        type_info_wrapper = self._run_fold(type_, TypeInfoWrapper(type_info, []))
-        args = [mypy.types.Instance(ti, []) for ti in type_info_wrapper.base_classes]
-        return mypy.types.Instance(type_info_wrapper.type_info, args=args)
-
-    def _run_fold(self, type_: mypy.types.Instance, intersection_type_info_wrapper: TypeInfoWrapper) -> TypeInfoWrapper:
-        intersections_to_process = deque([type_])
+        module = _current_module(self._context)
+        # Builder chains nest the intersection folded by the previous step in the next one - it's cheaper to extend it
+        # with the new members than to fold the whole chain again. The result is as deep as that (2), so has to be okay.
+        if self._settings.normalize and self._settings.max_depth >= 2:
+            extended = self._intersections.extend(module, type_, max_width=self._settings.max_width)
+            if extended is not None:
+                type_info, extended_members = extended
+                if (profile := PluginProfile.active) is not None:
+                    profile.record_intersection(width=len(extended_members), depth=2)
+                return mypy.types.Instance(type_info, args=list(extended_members))
+        collected = self._collect_members(type_)
+        if collected is None:
+            return mypy.types.AnyType(mypy.types.TypeOfAny.from_error)
+        members, depth = collected
+        if self._settings.normalize:
+            members = normalize_intersection_args(members)
+        if (profile := PluginProfile.active) is not None:
+            profile.record_intersection(width=len(members), depth=depth)
+        if len(members) > self._settings.max_width:
+            _error_too_wide(self._settings, context=self._context, node=self._context.context)
+            return mypy.types.AnyType(mypy.types.TypeOfAny.from_error)
+        type_info = self._intersections.get(module, members)
+        # members keep their type arguments this way, so that the intersection can be folded again
+        return mypy.types.Instance(type_info, args=list(members))
+
+    def _collect_members(self, type_: mypy.types.Instance) -> tuple[list[mypy.types.Instance], int] | None:
+        """Returns the members of nested intersections and how deep these are nested.
+
+        If they're nested deeper than allowed, an error is reported
+        and None is returned, without looking any deeper.
+        """
+        members = []
+        depth = 1
+        intersections_to_process = deque([(type_, depth)])
         while intersections_to_process:
-            intersection = intersections_to_process.popleft()
+            intersection, depth = intersections_to_process.popleft()
+            if depth > self._settings.max_depth:
+                _error_too_deep(self._settings, context=self._context, node=self._context.context)
+                return None
             for arg in intersection.args:
-                if self._is_intersection(arg):
-                    intersections_to_process.append(arg)
+                if is_intersection(arg):
+                    intersections_to_process.append((arg, depth + 1))
                     continue
                 if isinstance(arg, mypy.types.Instance):
+                    # reported for every occurrence, even if the intersection itself comes from the cache
                     if not arg.type.is_protocol:
                         _error_non_protocol_member(arg, context=self._context)
-                    self._add_type_to_intersection(intersection_type_info_wrapper, arg)
-        return intersection_type_info_wrapper
-
-    @staticmethod
-    def _add_type_to_intersection(intersection_type_info_wrapper: TypeInfoWrapper, typ: mypy.types.Instance) -> None:
-        # We might be interested in modifying another properties too (like
-        # intersection_type_info_wrapper.type_info.defn.base_type_exprs), but up until now it seems what we have is
-        # enough. Keep number of modified properties as low as possible (so that it's manageable).
-        #
-        # We also don't check for is_protocol in the bae classes - mypy doesn't allow protocol to have non-protocol base
-        # classes anyway and for direct ProtocolIntersection type arguments we do the check in type_analyze_hook.
-        intersection_type_info_wrapper.type_info.mro = [
-            base for base in typ.type.mro if base not in intersection_type_info_wrapper.type_info.mro
-        ] + intersection_type_info_wrapper.type_info.mro
-        intersection_type_info_wrapper.base_classes.insert(0, typ.type)
-
-    @staticmethod
-    def _is_intersection(typ: mypy.types.Type) -> TypeGuard[mypy.types.Instance]:
-        return isinstance(typ, mypy.types.Instance) and typ.type.fullname.startswith(
-            "typing_protocol_intersection.types.ProtocolIntersection"
-        )
+                    members.append(arg)
+        return members, depth
+
+
+_ArgT = typing.TypeVar("_ArgT", bound=mypy.types.Type)
+
 
+def normalize_intersection_args(args: Iterable[_ArgT]) -> list[_ArgT]:
+    """Brings intersection type arguments to their canonical form.
 
-def intersection_function_signature_hook(context: SignatureContext) -> mypy.types.FunctionLike:
-    resolver = ProtocolIntersectionResolver(context)
-    signature = context.default_signature
-    signature.ret_type = resolver.fold_intersection_and_its_args(signature.ret_type)
-    signature.arg_types = [resolver.fold_intersection_and_its_args(t) for t in signature.arg_types]
+    Nested intersections are flattened, duplicates and protocols that
+    are bases of other members (with the same type arguments) are
+    dropped, and what's left is sorted. This way intersections written
+    differently, but meaning the same, get the same members.
+    """
+    flattened: dict[_ArgT, None] = {}
+    args_to_process = deque(args)
+    while args_to_process:
+        arg = args_to_process.popleft()
+        if is_intersection(arg):
+            args_to_process.extend(typing.cast(Iterable[_ArgT], arg.args))
+        else:
+            flattened[arg] = None
+    member_infos = {arg.type for arg in flattened if isinstance(arg, mypy.types.Instance)}
+    implied = set()
+    for arg in flattened:
+        if isinstance(arg, mypy.types.Instance):
+            for base in arg.type.mro[1:]:
+                if base in member_infos:
+                    implied.add(mypy.maptype.map_instance_to_supertype(arg, base))
+    return sorted((arg for arg in flattened if arg not in implied), key=str)
+
+
+class _IntersectionDetector:
+    """Tells whether types contain a ProtocolIntersection at any depth.
+
+    Verdicts are remembered for every visited type object, so types
+    shared by several parts of a signature are only inspected once.
+    """
+
+    __slots__ = ("_verdicts", "_expanding_aliases")
+
+    def __init__(self) -> None:
+        # mypy types can't be weakly referenced, so the verdicts are keyed by id() and the types are kept alive along
+        # with them - otherwise their ids could be reused by other types. Detectors shouldn't outlive a single hook
+        # call.
+        self._verdicts: dict[int, tuple[mypy.types.Type, bool]] = {}
+        self._expanding_aliases: set[mypy.types.TypeAliasType] = set()
+
+    def __call__(self, type_: mypy.types.Type) -> bool:
+        verdict_entry = self._verdicts.get(id(type_))
+        if verdict_entry is not None:
+            return verdict_entry[1]
+        if isinstance(type_, mypy.types.TypeAliasType):
+            # guards against infinite recursion on recursive aliases like A = Union[int, List[A]] - whatever the alias
+            # contains is found by the outer expansion anyway
+            if type_ in self._expanding_aliases:
+                return False
+            self._expanding_aliases.add(type_)
+            try:
+                verdict = self(mypy.types.get_proper_type(type_))
+            finally:
+                self._expanding_aliases.discard(type_)
+        else:
+            verdict = is_intersection(type_) or any(self(component) for component in _component_types(type_))
+        self._verdicts[id(type_)] = (type_, verdict)
+        return verdict
+
+
+def _component_types(typ: mypy.types.Type) -> list[mypy.types.Type]:
+    components: list[mypy.types.Type] = []
+    if isinstance(typ, mypy.types.Instance):
+        components.extend(typ.args)
+    elif isinstance(typ, mypy.types.CallableType):
+        components.extend((*typ.arg_types, typ.ret_type))
+    elif isinstance(typ, mypy.types.Overloaded | mypy.types.TupleType | mypy.types.UnionType):
+        components.extend(typ.items)
+    elif isinstance(typ, mypy.types.TypedDictType):
+        components.extend(typ.items.values())
+    elif isinstance(typ, mypy.types.TypeType):
+        components.append(typ.item)
+    return components
+
+
+def _written_intersection_depth(
+    typ: mypy.types.UnboundType, api: mypy.plugin.TypeAnalyzerPluginInterface, *, max_depth: int
+) -> int:
+    """How many intersections are nested in the given, not yet analyzed one, with it being the outermost.
+
+    Doesn't look deeper than max_depth + 1, which is returned for anything nested deeper than allowed.
+    """
+    depth = 1
+    intersections_to_process = deque([(typ, depth)])
+    while intersections_to_process:
+        intersection, depth = intersections_to_process.popleft()
+        if depth > max_depth:
+            return depth
+        for arg in intersection.args:
+            if isinstance(arg, mypy.types.UnboundType) and _refers_to_intersection(arg, api):
+                intersections_to_process.append((arg, depth + 1))
+    return depth
+
+
+def _refers_to_intersection(typ: mypy.types.UnboundType, api: mypy.plugin.TypeAnalyzerPluginInterface) -> bool:
+    if not isinstance(api, mypy.typeanal.TypeAnalyser):
+        return False
+    symbol = api.lookup_qualified(typ.name, typ, suppress_errors=True)
+    return symbol is not None and symbol.node is not None and symbol.node.fullname == PROTOCOL_INTERSECTION_FULLNAME
+
+
+def _current_module(context: AnyContext) -> mypy.nodes.MypyFile:
+    api: object = context.api
+    if isinstance(api, mypy.typeanal.TypeAnalyser):
+        api = api.api
+    if isinstance(api, mypy.semanal.SemanticAnalyzer):
+        return api.cur_mod_node
+    assert isinstance(api, mypy.checker.TypeChecker)
+    return api.tree
+
+
+@profiled
+def intersection_function_signature_hook(
+    context: SignatureContext, *, intersections: IntersectionCache, settings: PluginSettings
+) -> mypy.types.FunctionLike:
+    # The default signature may be shared with mypy (e.g. be the declared type of a non-generic function), so it's never
+    # modified. It's returned as it is if there's nothing to fold, and copied once otherwise.
+    resolver = ProtocolIntersectionResolver(context, intersections, settings)
+    signature = resolver.fold_intersections(context.default_signature)
+    assert isinstance(signature, mypy.types.CallableType)
     return signature
 
 
-def type_analyze_hook(fullname: str) -> Callable[[mypy.plugin.AnalyzeTypeContext], mypy.types.Type]:
+@profiled
+def composite_hook(
+    context: mypy.plugin.FunctionContext,
+    *,
+    intersections: IntersectionCache,
+    settings: PluginSettings,
+    lookup_fully_qualified: Callable[[str], mypy.nodes.SymbolTableNode | None],
+) -> mypy.types.Type:
+    """Types composite(X, Y) as a constructor taking an X and a Y, and making a ProtocolIntersection[X, Y]."""
+    if mypy.nodes.ARG_STAR in context.arg_kinds[0]:
+        # the protocols of composite(*protocols) are only known at runtime
+        return context.default_return_type
+    protocols = []
+    for arg_type, arg in zip(context.arg_types[0], context.args[0], strict=True):
+        protocol = _protocol_of_type_object(arg_type)
+        if protocol is None:
+            context.api.fail("Only Protocols can be composed.", arg, code=mypy.errorcodes.VALID_TYPE)
+            return context.default_return_type
+        protocols.append(protocol)
+    # the checker can only look up names of the modules that the checked one imports directly
+    symbol = lookup_fully_qualified(PROTOCOL_INTERSECTION_FULLNAME)
+    if not protocols or symbol is None or not isinstance(symbol.node, mypy.nodes.TypeInfo):
+        return context.default_return_type
+    resolver = ProtocolIntersectionResolver(context, intersections, settings)
+    intersection = resolver.fold_intersection(mypy.types.Instance(symbol.node, list(protocols)))
+    # the parts are taken in the order of the protocols as written, whatever the order of the intersection's members
+    return mypy.types.CallableType(
+        arg_types=list(protocols),
+        arg_kinds=[mypy.nodes.ARG_POS] * len(protocols),
+        arg_names=[None] * len(protocols),
+        ret_type=intersection,
+        fallback=context.api.named_generic_type("builtins.function", []),
+    )
+
+
+def _protocol_of_type_object(typ: mypy.types.Type) -> mypy.types.Instance | None:
+    """Returns the protocol that the type is the class of, if it's one - like X, for the type of expression X."""
+    typ = mypy.types.get_proper_type(typ)
+    if isinstance(typ, mypy.types.FunctionLike) and typ.is_type_obj():
+        type_info = typ.type_object()
+        instance = mypy.types.Instance(
+            type_info, [mypy.types.AnyType(mypy.types.TypeOfAny.special_form)] * len(type_info.defn.type_vars)
+        )
+    elif isinstance(typ, mypy.types.TypeType) and isinstance(typ.item, mypy.types.Instance):
+        instance = typ.item
+    else:
+        return None
+    return instance if instance.type.is_protocol else None
+
+
+def type_analyze_hook(
+    *, intersections: IntersectionCache, settings: PluginSettings
+) -> Callable[[mypy.plugin.AnalyzeTypeContext], mypy.types.Type]:
+    @profiled
     def _type_analyze_hook(context: mypy.plugin.AnalyzeTypeContext) -> mypy.types.Type:
-        args = tuple(context.api.analyze_type(arg_t) for arg_t in context.type.args)
-        base_types_of_args = set()
+        # Nested intersections are flattened once analyzed (if normalized), so the depth is measured as written. This
+        # also spares analyzing the arguments of the ones that are too deep.
+        depth = _written_intersection_depth(context.type, context.api, max_depth=settings.max_depth)
+        if depth > settings.max_depth:
+            if (profile := PluginProfile.active) is not None:
+                profile.record_intersection(width=len(context.type.args), depth=depth)
+            _error_too_deep(settings, context=context, node=context.type)
+            return mypy.types.AnyType(mypy.types.TypeOfAny.from_error)
+        args = [context.api.analyze_type(arg_t) for arg_t in context.type.args]
         for arg in args:
-            if isinstance(arg, mypy.types.Instance):
-                if arg.type.is_protocol:
-                    base_types_of_args.update(arg.type.mro)
-                else:
-                    _error_non_protocol_member(arg, context=context)
-        symbol_table = mypy.nodes.SymbolTable(collections.ChainMap(*(base.names for base in base_types_of_args)))
-        type_info = mk_protocol_intersection_typeinfo(
-            context.type.name, fullname=UniqueFullname(fullname), symbol_table=symbol_table
-        )
-        # add base classes to MRO - this way we can support protocols inheriting one another
-        # we don't really care for mro here
-        type_info.mro = list(base_types_of_args) + type_info.mro
+            if isinstance(arg, mypy.types.Instance) and not arg.type.is_protocol:
+                _error_non_protocol_member(arg, context=context)
+        if settings.normalize:
+            args = normalize_intersection_args(args)
+        protocol_args = [arg for arg in args if isinstance(arg, mypy.types.Instance) and arg.type.is_protocol]
+        if (profile := PluginProfile.active) is not None:
+            profile.record_intersection(width=len(protocol_args), depth=depth)
+        if len(protocol_args) > settings.max_width:
+            _error_too_wide(settings, context=context, node=context.type)
+            return mypy.types.AnyType(mypy.types.TypeOfAny.from_error)
+        type_info = intersections.get(_current_module(context), protocol_args)
         return mypy.types.Instance(type_info, args, line=context.type.line, column=context.type.column)
 
     return _type_analyze_hook
 
 
+INTERSECTION_LIMIT = mypy.errorcodes.ErrorCode(
+    "intersection-limit", "Check that ProtocolIntersections are within the limits of the plugin", "General"
+)
+
+
+def _error_too_deep(settings: PluginSettings, *, context: AnyContext, node: mypy.nodes.Context) -> None:
+    context.api.fail(
+        f"ProtocolIntersection nested more than {settings.max_depth} levels deep"
+        f" (see max_depth in the [{CONFIG_SECTION}] config section).",
+        node,
+        code=INTERSECTION_LIMIT,
+    )
+
+
+def _error_too_wide(settings: PluginSettings, *, context: AnyContext, node: mypy.nodes.Context) -> None:
+    context.api.fail(
+        f"ProtocolIntersection of more than {settings.max_width} protocols"
+        f" (see max_width in the [{CONFIG_SECTION}] config section).",
+        node,
+        code=INTERSECTION_LIMIT,
+    )
+
+
 def _error_non_protocol_member(arg: mypy.types.Type, *, context: AnyContext) -> None:
     context.api.fail("Only Protocols can be used in ProtocolIntersection.", arg, code=mypy.errorcodes.VALID_TYPE)
 
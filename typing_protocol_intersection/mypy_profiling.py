@@ -0,0 +1,100 @@
+import atexit
+import functools
+import importlib.metadata
+import json
+import threading
+import time
+import typing
+from collections import Counter
+from collections.abc import Callable
+
+try:
+    PLUGIN_VERSION = importlib.metadata.version("typing-protocol-intersection")
+except importlib.metadata.PackageNotFoundError:  # running from a source checkout
+    PLUGIN_VERSION = "unknown"
+
+PROFILE_ENV_VAR = "TYPING_PROTOCOL_INTERSECTION_PROFILE"
+
+
+class PluginProfile:
+    """Counters and timers of the plugin's work, written as JSON at exit.
+
+    Profiling is opt-in - it's enabled by setting PROFILE_ENV_VAR (or
+    the profile setting) to the path of the report. Otherwise the
+    profiled functions only check whether there's a profile to update,
+    and the hook getters of the plugin, which mypy calls for nearly
+    every name, aren't wrapped.
+    """
+
+    active: typing.ClassVar["PluginProfile | None"] = None
+
+    def __init__(self, report_path: str) -> None:
+        self.report_path = report_path
+        self.calls: Counter[str] = Counter()
+        self.seconds: dict[str, float] = {}
+        self.intersections_created = 0
+        self.widest_intersection = 0
+        self.deepest_intersection = 0
+        # hooks can be called from several threads at once, and none of the updates below is atomic
+        self._lock = threading.Lock()
+
+    def record_call(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.calls[name] += 1
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def record_intersection(self, *, width: int, depth: int) -> None:
+        with self._lock:
+            self.widest_intersection = max(self.widest_intersection, width)
+            self.deepest_intersection = max(self.deepest_intersection, depth)
+
+    def record_intersection_created(self) -> None:
+        with self._lock:
+            self.intersections_created += 1
+
+    def report(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "plugin_version": PLUGIN_VERSION,
+                "calls": dict(sorted(self.calls.items())),
+                "seconds": dict(sorted(self.seconds.items())),
+                "folds": self.calls["fold_intersection"],
+                "intersections_created": self.intersections_created,
+                "widest_intersection": self.widest_intersection,
+                "deepest_intersection": self.deepest_intersection,
+            }
+
+    def write_report(self) -> None:
+        with open(self.report_path, "w", encoding="utf-8") as report_file:
+            json.dump(self.report(), report_file, indent=2)
+
+
+_PROFILING_LOCK = threading.Lock()
+
+
+def enable_profiling(report_path: str) -> PluginProfile:
+    with _PROFILING_LOCK:
+        profile = PluginProfile.active
+        if profile is None or profile.report_path != report_path:
+            profile = PluginProfile.active = PluginProfile(report_path)
+            atexit.register(profile.write_report)
+        return profile
+
+
+_P = typing.ParamSpec("_P")
+_R = typing.TypeVar("_R")
+
+
+def profiled(func: Callable[_P, _R]) -> Callable[_P, _R]:
+    @functools.wraps(func)
+    def _profiled_func(*args: _P.args, **kwargs: _P.kwargs) -> _R:
+        profile = PluginProfile.active
+        if profile is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.record_call(func.__name__, time.perf_counter() - start)
+
+    return _profiled_func
@@ -1,4 +1,17 @@
-from typing import Any
+import contextlib
+import functools
+import inspect
+import itertools
+import operator
+import threading
+import types
+import typing
+import weakref
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, TypeVar, overload
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+_T = TypeVar("_T")
 
 
 class ProtocolIntersection:
@@ -19,8 +32,503 @@ class ProtocolIntersection:
         >>> def foo(bar: Has[X, Y, Z]) -> None:
         ...     pass
 
+    At runtime, Has[X, Y] evaluates to an alias exposing its members
+    the way typing's generic aliases do - its __origin__ is
+    ProtocolIntersection and its __args__ are (X, Y). typing.get_origin()
+    and typing.get_args() only know typing's own aliases though, so
+    these return None and () for it. Aliases are interned, subscripting
+    with the same members again gives the very same alias.
+
+    Intersections of runtime_checkable protocols support isinstance()
+    and issubclass() checks - an object is an instance of the
+    intersection if it's an instance of all of its members.
+
     See package's README or tests for more advanced examples.
     """
 
-    def __class_getitem__(cls, _item: Any) -> type["ProtocolIntersection"]:
-        return cls
+    def __class_getitem__(cls, item: Any) -> "_ProtocolIntersectionAlias":
+        members = item if isinstance(item, tuple) else (item,)
+        try:
+            return _intern(members)
+        except TypeError:
+            # unhashable members, like typing does for those - fine, just not interned
+            return _ProtocolIntersectionAlias(members)
+
+
+class _ProtocolIntersectionAlias:
+    """What ProtocolIntersection[...] evaluates to at runtime.
+
+    Checking an instance against a protocol walks all the protocol's
+    members. Most of them are defined by the instance's class though, so
+    which members are satisfied by the class alone is only found out once
+    per class - only the rest is checked for every instance.
+    """
+
+    __slots__ = ("__args__", "_hash", "_class_checks", "_subclass_verdicts", "_composite_class", "__weakref__")
+
+    __origin__ = ProtocolIntersection
+
+    def __init__(self, members: tuple[Any, ...]) -> None:
+        self.__args__ = members
+        try:
+            self._hash: int | None = hash((ProtocolIntersection, members))
+        except TypeError:
+            self._hash = None
+        # class -> what its instances still need to be checked for, see _ClassCheck.
+        # Classes are weakly referenced, so that they can still be collected. The tables are only made once there's
+        # something to put in them, as most aliases are only ever used in annotations.
+        self._class_checks: typing.Mapping[type, _ClassCheck] = _NOTHING_CHECKED
+        self._subclass_verdicts: typing.Mapping[type, bool] = _NOTHING_CHECKED
+        # see composite - built on the first use
+        self._composite_class: type | None = None
+
+    def __instancecheck__(self, instance: object) -> bool:
+        class_check = self._class_checks.get(type(instance))
+        if class_check is None:
+            class_check = self._class_check(type(instance))
+        # most classes satisfy all the members on their own - not calling anything then is a measurable win
+        return not class_check.residual_members or class_check.admits(instance)
+
+    def _class_check(self, cls: type) -> "_ClassCheck":
+        class_check = self._class_checks.get(cls)
+        if class_check is None:
+            residual_members = _residual_members_of(cls, self.__args__)
+            class_check = _ClassCheck(residual_members, _instance_attrs_of(cls, residual_members))
+            class_checks = self._class_checks
+            if not isinstance(class_checks, weakref.WeakKeyDictionary):
+                class_checks = self._class_checks = weakref.WeakKeyDictionary()
+            class_checks[cls] = class_check
+        return class_check
+
+    def _composite(self) -> type:
+        if self._composite_class is None:
+            with _composite_lock:
+                if self._composite_class is None:
+                    self._composite_class = _mk_composite_class(self)
+        return self._composite_class
+
+    def __subclasscheck__(self, cls: type) -> bool:
+        try:
+            return self._subclass_verdicts[cls]
+        except KeyError:
+            pass
+        verdict = all(issubclass(cls, member) for member in self.__args__)
+        subclass_verdicts = self._subclass_verdicts
+        if not isinstance(subclass_verdicts, weakref.WeakKeyDictionary):
+            subclass_verdicts = self._subclass_verdicts = weakref.WeakKeyDictionary()
+        subclass_verdicts[cls] = verdict
+        return verdict
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        # intersections can't be instantiated - this is only here because typing.get_type_hints (on Python 3.10) only
+        # takes callables for types
+        raise TypeError("Cannot instantiate ProtocolIntersection")
+
+    def __or__(self, other: Any) -> Any:
+        # typing's unions of types, as Has[X, Y] | None isn't one of the unions of classes that type.__or__ makes
+        return typing.Union[self, other]  # noqa: UP007 - this is what makes the | syntax work in the first place
+
+    def __ror__(self, other: Any) -> Any:
+        return typing.Union[other, self]  # noqa: UP007 - see __or__
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # unpickled as ProtocolIntersection[...], so that it's the interned alias again
+        return operator.getitem, (ProtocolIntersection, self.__args__)
+
+    def __copy__(self) -> "_ProtocolIntersectionAlias":
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "_ProtocolIntersectionAlias":
+        return self
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, _ProtocolIntersectionAlias):
+            return NotImplemented
+        return self.__args__ == other.__args__
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            raise TypeError(f"unhashable members of {self!r}")
+        return self._hash
+
+    def __repr__(self) -> str:
+        members = ", ".join(typing._type_repr(member) for member in self.__args__)  # type: ignore[attr-defined]  # pylint: disable=protected-access
+        return f"typing_protocol_intersection.ProtocolIntersection[{members}]"
+
+
+_NOTHING_CHECKED: typing.Mapping[Any, Any] = types.MappingProxyType({})
+
+# members -> their alias. Aliases are only weakly referenced, so that neither they, nor their members, are kept alive
+# just for being interned - it's _intern that keeps the recently used ones alive.
+_interned_aliases: weakref.WeakValueDictionary[tuple[Any, ...], _ProtocolIntersectionAlias] = (
+    weakref.WeakValueDictionary()
+)
+_interning_lock = threading.Lock()
+
+# how many of the most recently used aliases are kept alive, even if nothing else holds them
+_RECENTLY_USED_ALIASES = 256
+
+
+@functools.lru_cache(maxsize=_RECENTLY_USED_ALIASES)
+def _intern(members: tuple[Any, ...]) -> _ProtocolIntersectionAlias:
+    # Annotations hold on to their aliases, but expressions like isinstance(obj, Has[X, Y]) would drop them right away -
+    # and with them, everything they've found out about the classes checked against them. Kept alive (like typing
+    # keeps its recently used aliases), the alias is looked up at the cost of a single call instead.
+    alias = _interned_aliases.get(members)
+    if alias is None:
+        with _interning_lock:
+            alias = _interned_aliases.get(members)
+            if alias is None:
+                alias = _interned_aliases[members] = _ProtocolIntersectionAlias(members)
+    return alias
+
+
+def _residual_members_of(cls: type, members: tuple[Any, ...]) -> tuple[Any, ...]:
+    """Returns the members that not all instances of the class are instances of, at least as far as the class tells.
+
+    The class satisfies a protocol for all its instances if it's a
+    nominal subclass of it, or if it defines all the protocol's
+    attributes itself (with anything but data descriptors, which may
+    raise AttributeError, or None, which blocks methods). Otherwise
+    instances need to be checked one by one - they may have the missing
+    attributes in their own __dict__. Members that aren't protocols are
+    always checked one by one, isinstance() is fast for them anyway.
+    """
+    residual_members = []
+    for member in members:
+        if not getattr(member, "_is_protocol", False):
+            residual_members.append(member)
+            continue
+        if not getattr(member, "_is_runtime_protocol", False):
+            raise TypeError("Instance and class checks can only be used with @runtime_checkable protocols")
+        if member in cls.__mro__:
+            continue
+        if not all(_defines_statically(cls, attr) for attr in _protocol_attrs(member)):
+            residual_members.append(member)
+    return tuple(residual_members)
+
+
+def _instance_attrs_of(cls: type, residual_members: tuple[Any, ...]) -> tuple[str, ...] | None:
+    """Returns the attributes that, set in an instance's own __dict__, make it an instance of all the residual members.
+
+    These are the residual protocols' attributes that the class doesn't
+    define at all - an instance having them all in its __dict__ (and
+    none of them None) conforms however the protocols get checked. None
+    is returned if that's not enough to tell: when the class defines some
+    of the attributes in ways that instances can't override, when some
+    members aren't protocols, or when the class customizes attribute
+    access.
+    """
+    if cls.__getattribute__ is not object.__getattribute__:  # type: ignore[comparison-overlap]
+        return None
+    instance_attrs = []
+    for member in residual_members:
+        if not getattr(member, "_is_protocol", False):
+            return None
+        for attr in _protocol_attrs(member):
+            if not any(attr in base.__dict__ for base in cls.__mro__):
+                instance_attrs.append(attr)
+            elif not _defines_statically(cls, attr):
+                return None
+    return tuple(instance_attrs)
+
+
+class _ClassCheck(typing.NamedTuple):
+    """What instances of a class still need to be checked for to be instances of an intersection."""
+
+    # see _residual_members_of
+    residual_members: tuple[Any, ...]
+    # see _instance_attrs_of
+    instance_attrs: tuple[str, ...] | None
+
+    def admits(self, instance: object) -> bool:
+        if self.instance_attrs is not None:
+            own_attrs = getattr(instance, "__dict__", None)
+            if own_attrs is not None and all(own_attrs.get(attr) is not None for attr in self.instance_attrs):
+                return True
+        return all(isinstance(instance, member) for member in self.residual_members)
+
+
+def _defines_statically(cls: type, attr: str) -> bool:
+    for base in cls.__mro__:
+        if attr in base.__dict__:
+            value = base.__dict__[attr]
+            value_type = type(value)
+            is_data_descriptor = hasattr(value_type, "__set__") or hasattr(value_type, "__delete__")
+            return value is not None and not is_data_descriptor
+    return False
+
+
+def _protocol_attrs(protocol: type) -> typing.Collection[str]:
+    # Python 3.12+ computes these once per protocol, older versions only have a (private) helper computing them anew
+    protocol_attrs: typing.Collection[str] | None = getattr(protocol, "__protocol_attrs__", None)
+    if protocol_attrs is None:
+        protocol_attrs = typing._get_protocol_attrs(protocol)  # type: ignore[attr-defined]  # pylint: disable=protected-access
+    return protocol_attrs
+
+
+@overload
+def enforce_intersections(func: _F, /) -> _F: ...
+
+
+@overload
+def enforce_intersections(*, sample: int = 1) -> Callable[[_F], _F]: ...
+
+
+def enforce_intersections(func: _F | None = None, /, *, sample: int = 1) -> _F | Callable[[_F], _F]:
+    """Checks arguments and return values annotated with ProtocolIntersection[...] at call time.
+
+    Annotations are resolved once, when the function is decorated (or on
+    its first call, if they refer to names that aren't defined yet), and
+    only parameters annotated with an intersection directly are checked.
+    Which members a class satisfies on its own is cached per class and
+    intersection, just like for isinstance().
+
+    With sample=N, only every N-th call is checked - so that checks can be
+    left on where their cost matters, still catching objects that keep
+    coming from untyped code. Violations raise TypeError.
+
+    Example usage:
+        >>> @enforce_intersections(sample=100)
+        ... def foo(bar: Has[X, Y]) -> None:
+        ...     pass
+    """
+    if sample < 1:
+        raise ValueError(f"sample has to be a positive integer, got {sample!r}")
+
+    def decorate(func: _F) -> _F:
+        checker = _SignatureChecker(func)
+        count_call = itertools.count().__next__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def check_coroutine(*args: Any, **kwargs: Any) -> Any:
+                if sample == 1 or not count_call() % sample:
+                    checker.check_arguments(args, kwargs)
+                    return checker.check_return_value(await func(*args, **kwargs))
+                return await func(*args, **kwargs)
+
+            return typing.cast(_F, check_coroutine)
+
+        @functools.wraps(func)
+        def check(*args: Any, **kwargs: Any) -> Any:
+            if sample == 1 or not count_call() % sample:
+                checker.check_arguments(args, kwargs)
+                return checker.check_return_value(func(*args, **kwargs))
+            return func(*args, **kwargs)
+
+        return typing.cast(_F, check)
+
+    return decorate if func is None else decorate(func)
+
+
+class _Check(typing.NamedTuple):
+    intersection: _ProtocolIntersectionAlias
+    conforms: Callable[[object], bool]
+
+
+class _SignatureChecker:
+    """Checks the arguments and return values of a function against the intersections in its annotations.
+
+    Parameters are looked up in the passed args and kwargs by their
+    precomputed positions and names, without binding them to the
+    signature, and checked by calling their intersections'
+    __instancecheck__ directly, without going through isinstance().
+    """
+
+    __slots__ = ("_func", "_parameters", "_var_positional", "_var_keyword", "_named", "_return")
+
+    _parameters: list[tuple[int | None, str | None, _Check]]
+    _var_positional: tuple[int, _Check] | None
+    _var_keyword: _Check | None
+    _named: frozenset[str]
+    _return: _Check | None
+
+    def __init__(self, func: Callable[..., Any]) -> None:
+        self._func = func
+        # a NameError is most likely a forward reference to something defined later - resolved on the first call then
+        with contextlib.suppress(NameError):
+            self._resolve()
+
+    def check_arguments(self, args: tuple[Any, ...], kwargs: dict[str, Any]) -> None:
+        try:
+            parameters = self._parameters
+        except AttributeError:
+            self._resolve()
+            parameters = self._parameters
+        for position, name, check in parameters:
+            if position is not None and position < len(args):
+                value = args[position]
+            elif name is not None and name in kwargs:
+                value = kwargs[name]
+            else:
+                continue  # the default is used
+            if not check.conforms(value):
+                self._fail(f"argument {name or position!r}", value, check.intersection)
+        if self._var_positional is not None:
+            start, check = self._var_positional
+            for position, value in enumerate(args[start:], start):
+                if not check.conforms(value):
+                    self._fail(f"argument {position}", value, check.intersection)
+        if self._var_keyword is not None:
+            check = self._var_keyword
+            for name, value in kwargs.items():
+                if name not in self._named and not check.conforms(value):
+                    self._fail(f"argument {name!r}", value, check.intersection)
+
+    def check_return_value(self, value: Any) -> Any:
+        if self._return is not None and not self._return.conforms(value):
+            self._fail("return value", value, self._return.intersection)
+        return value
+
+    def _resolve(self) -> None:
+        hints = typing.get_type_hints(self._func)
+        parameters, var_positional, var_keyword, named = [], None, None, set()
+        for position, parameter in enumerate(inspect.signature(self._func).parameters.values()):
+            if parameter.kind is not parameter.POSITIONAL_ONLY:
+                named.add(parameter.name)
+            intersection = hints.get(parameter.name)
+            if not isinstance(intersection, _ProtocolIntersectionAlias):
+                continue
+            check = _Check(intersection, intersection.__instancecheck__)
+            if parameter.kind is parameter.VAR_POSITIONAL:
+                var_positional = (position, check)
+            elif parameter.kind is parameter.VAR_KEYWORD:
+                var_keyword = check
+            else:
+                parameters.append(
+                    (
+                        None if parameter.kind is parameter.KEYWORD_ONLY else position,
+                        None if parameter.kind is parameter.POSITIONAL_ONLY else parameter.name,
+                        check,
+                    )
+                )
+        return_hint = hints.get("return")
+        self._var_positional, self._var_keyword, self._named = var_positional, var_keyword, frozenset(named)
+        self._return = (
+            _Check(return_hint, return_hint.__instancecheck__)
+            if isinstance(return_hint, _ProtocolIntersectionAlias)
+            else None
+        )
+        # set last, its presence tells that everything's resolved
+        self._parameters = parameters
+
+    def _fail(self, what: str, value: Any, intersection: _ProtocolIntersectionAlias) -> typing.NoReturn:
+        raise TypeError(f"{what} of {self._func.__qualname__}() {_describe_nonconformance(value, intersection)}")
+
+
+def iter_conforming(
+    intersection: _ProtocolIntersectionAlias, elements: Iterable[_T], *, strict: bool = True
+) -> Iterator[_T]:
+    """Lazily checks that every element is an instance of the intersection.
+
+    Elements are passed through as they come. With strict=True (the
+    default), TypeError is raised at the first element that doesn't
+    conform, otherwise such elements are skipped.
+
+    Elements are grouped by their classes - which members a class
+    satisfies on its own is found out once per class, so for a batch of
+    instances of a few classes only their instance-level attributes are
+    checked one by one. Only the classes are remembered, so memory stays
+    constant however long the stream is.
+
+    Example usage:
+        >>> for row in iter_conforming(Has[X, Y], rows):
+        ...     pass
+    """
+    if not isinstance(intersection, _ProtocolIntersectionAlias):
+        raise TypeError(f"Expected ProtocolIntersection[...], got {intersection!r}")
+    return _iter_conforming(intersection, elements, strict=strict)
+
+
+def _iter_conforming(intersection: _ProtocolIntersectionAlias, elements: Iterable[_T], *, strict: bool) -> Iterator[_T]:
+    # a plain dict local to the stream is way cheaper to look classes up in than the alias' weak one
+    class_checks: dict[type, _ClassCheck] = {}
+    for position, element in enumerate(elements):
+        class_check = class_checks.get(type(element))
+        if class_check is None:
+            class_check = class_checks[type(element)] = intersection._class_check(type(element))  # pylint: disable=protected-access
+        if not class_check.residual_members or class_check.admits(element):
+            yield element
+        elif strict:
+            raise TypeError(f"element {position} {_describe_nonconformance(element, intersection)}")
+
+
+def _describe_nonconformance(value: Any, intersection: _ProtocolIntersectionAlias) -> str:
+    missing = ", ".join(
+        typing._type_repr(member)  # type: ignore[attr-defined]  # pylint: disable=protected-access
+        for member in intersection.__args__
+        if not isinstance(value, member)
+    )
+    return f"is not an instance of {intersection!r}: {type(value).__qualname__} doesn't conform to {missing}"
+
+
+def composite(*protocols: type) -> Callable[..., Any]:
+    """Returns the class of proxies delegating to one object per protocol.
+
+    composite(X, Y)(x, y) makes an object conforming to both X and Y,
+    delegating the members of X to x and the members of Y to y (the
+    first protocol wins members defined by several ones). Proxy classes
+    have __slots__ for the delegates and a property for every protocol
+    member, so accessing them costs about as much as accessing the
+    delegates' attributes directly - there's no __getattr__ involved.
+    There's one class per combination of protocols, built on its first
+    use.
+
+    With the typing_protocol_intersection plugin, mypy types proxies as
+    ProtocolIntersection[X, Y], and checks the delegates against their
+    protocols.
+
+    Example usage:
+        >>> proxy = composite(X, Y)(x, y)
+    """
+    if not protocols:
+        raise TypeError("composite() takes at least one protocol")
+    # the same as ProtocolIntersection[protocols], which mypy wouldn't take
+    intersection = ProtocolIntersection.__class_getitem__(protocols)
+    return intersection._composite()  # pylint: disable=protected-access
+
+
+_composite_lock = threading.Lock()
+
+
+def _mk_composite_class(intersection: _ProtocolIntersectionAlias) -> type:
+    protocols = intersection.__args__
+    for protocol in protocols:
+        if not getattr(protocol, "_is_protocol", False):
+            raise TypeError(f"Only Protocols can be composed, got {protocol!r}")
+    slots = tuple(f"_composite_part_{i}" for i in range(len(protocols)))
+    namespace: dict[str, Any] = {}
+    for slot, protocol in zip(slots, protocols, strict=True):
+        for attr in sorted(_protocol_attrs(protocol)):
+            namespace.setdefault(attr, _mk_delegating_property(slot, attr))
+
+    def __init__(self: Any, *parts: Any) -> None:  # noqa: N807
+        if len(parts) != len(slots):
+            raise TypeError(f"{type(self).__qualname__}() takes {len(slots)} parts, got {len(parts)}")
+        for slot, part in zip(slots, parts, strict=True):
+            setattr(self, slot, part)
+
+    def __repr__(self: Any) -> str:  # noqa: N807
+        parts = ", ".join(repr(getattr(self, slot)) for slot in slots)
+        return f"{type(self).__qualname__}({parts})"
+
+    namespace.setdefault("__repr__", __repr__)
+    namespace.update(__slots__=slots, __init__=__init__, __intersection__=intersection, __module__=__name__)
+    # the name says what the class is made of in reprs and tracebacks, like the intersection's repr does
+    names = ", ".join(typing._type_repr(protocol) for protocol in protocols)  # type: ignore[attr-defined]  # pylint: disable=protected-access
+    return type(f"Composite[{names}]", (), namespace)
+
+
+def _mk_delegating_property(slot: str, attr: str) -> property:
+    get_part = operator.attrgetter(slot)
+
+    def set_attr(self: Any, value: Any) -> None:
+        setattr(get_part(self), attr, value)
+
+    def del_attr(self: Any) -> None:
+        delattr(get_part(self), attr)
+
+    # attrgetter gets the delegate's attribute without running any Python code
+    return property(operator.attrgetter(f"{slot}.{attr}"), set_attr, del_attr, f"Delegates to the {attr} of a part.")